@@ -1,7 +1,13 @@
 """API utilities for modifying data via FreeIPA."""
 
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from functools import cache
 from secrets import token_urlsafe
+from typing import Any
 
 try:
     from bonsai import LDAPDN
@@ -11,100 +17,207 @@ except ImportError:
     BONSAI_AVAILABLE = False
 
 from python_freeipa import ClientMeta
+from python_freeipa.exceptions import FreeIPAError, Unauthorized
 
 from arthur.config import CONFIG
 from arthur.constants import LDAP_ROLE_MAPPING
+from arthur.log import logger
 
 PW_LENGTH = 20
+MAX_FREEIPA_WORKERS = 4
+MAX_BATCH_SIZE = 100
+
+# python_freeipa is synchronous, so requests are made on a dedicated pool of threads to keep them
+# off the event loop without competing with other users of the default executor.
+_executor = ThreadPoolExecutor(max_workers=MAX_FREEIPA_WORKERS, thread_name_prefix="freeipa")
+_login_lock = threading.Lock()
+
+
+def _login(client: ClientMeta) -> None:
+    username = LDAPDN(CONFIG.ldap_bind_user).rdns[0][0][1]
+    client.login(username, CONFIG.ldap_bind_password.get_secret_value())
 
 
 @cache
 def create_client() -> ClientMeta:
     """Create a new client and login to FreeIPA."""
-    username = LDAPDN(CONFIG.ldap_bind_user).rdns[0][0][1]
-
     client = ClientMeta(
         CONFIG.ldap_host.host, verify_ssl=CONFIG.ldap_certificate_location.as_posix()
     )
 
-    client.login(username, CONFIG.ldap_bind_password.get_secret_value())
+    _login(client)
 
     return client
 
 
-def get_user(username: str) -> dict:
-    """Fetch a user from FreeIPA."""
-    client = create_client()
+def _call(method: str, *args: Any, **kwargs: Any) -> Any:
+    """Call a client method, logging in again if the session has expired."""
+    with _login_lock:
+        client = create_client()
+
+    try:
+        return getattr(client, method)(*args, **kwargs)
+    except Unauthorized:
+        logger.info("FreeIPA: Session expired, logging in again.")
+        with _login_lock:
+            _login(client)
+        return getattr(client, method)(*args, **kwargs)
+
+
+async def _run(method: str, *args: Any, **kwargs: Any) -> Any:
+    """Call a client method on the FreeIPA thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(_call, method, *args, **kwargs))
 
-    return client.user_show(username)
 
+@dataclass(frozen=True)
+class Operation:
+    """A single FreeIPA command, to be sent as part of a batch."""
 
-def set_user_groups(username: str, groups: list[str]) -> None:
+    method: str
+    args: list[str]
+    options: dict[str, Any] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        return f"{self.method} {' '.join(self.args)} {self.options}"
+
+
+@dataclass(frozen=True)
+class OperationResult:
+    """The outcome of an operation in a batch. `error` is None if it succeeded."""
+
+    operation: Operation
+    error: str | None
+
+
+def _operation_error(result: dict) -> str | None:
+    """Return the reason a batched command failed, or None if it succeeded."""
+    if result.get("error"):
+        return result["error"]
+
+    # Membership commands succeed as a whole even if some members could not be changed.
+    failures = [
+        f"{member}: {reason}"
+        for members in result.get("failed", {}).values()
+        for entries in members.values()
+        for member, reason in entries
+    ]
+    return "; ".join(failures) or None
+
+
+async def batch(operations: list[Operation]) -> list[OperationResult]:
     """
-    Update a members groups to the provided list.
+    Run operations with FreeIPA's batch command, in chunks of `MAX_BATCH_SIZE`.
 
-    Any managed groups not specified will be removed from the user.
+    Operations are run in order, and a failed operation does not stop the ones after it.
     """
-    user = get_user(username)
+    results = []
+    for start in range(0, len(operations), MAX_BATCH_SIZE):
+        chunk = operations[start : start + MAX_BATCH_SIZE]
+        response = await _run(
+            "batch",
+            a_methods=[
+                {"method": operation.method, "params": [operation.args, operation.options]}
+                for operation in chunk
+            ],
+        )
+        results.extend(
+            OperationResult(operation, _operation_error(result))
+            for operation, result in zip(chunk, response["results"], strict=True)
+        )
 
-    client = create_client()
+    return results
 
-    memberof_groups = user.get("result", {}).get("memberof_group", [])
 
-    add_groups = [group for group in groups if group not in memberof_groups]
+def add_group_member(group: str, username: str) -> Operation:
+    """Return an operation adding a user to a group."""
+    return Operation("group_add_member", [group], {"user": [username]})
+
+
+def remove_group_member(group: str, username: str) -> Operation:
+    """Return an operation removing a user from a group."""
+    return Operation("group_remove_member", [group], {"user": [username]})
+
+
+def group_operations(
+    username: str, groups: list[str], current_groups: list[str]
+) -> list[Operation]:
+    """
+    Return the operations that change a user's groups from `current_groups` to `groups`.
+
+    Any managed groups not specified will be removed from the user.
+    """
+    add_groups = [group for group in groups if group not in current_groups]
     remove_groups = [
-        group for group in memberof_groups if group not in groups and group in LDAP_ROLE_MAPPING
+        group for group in current_groups if group not in groups and group in LDAP_ROLE_MAPPING
+    ]
+
+    return [add_group_member(group, username) for group in add_groups] + [
+        remove_group_member(group, username) for group in remove_groups
     ]
 
-    for group in add_groups:
-        client.group_add_member(group, o_user=[username])
 
-    for group in remove_groups:
-        client.group_remove_member(group, o_user=[username])
+async def get_user(username: str) -> dict:
+    """Fetch a user from FreeIPA."""
+    return await _run("user_show", username)
 
 
-def deactivate_user(username: str) -> None:
-    """Deactivate a user in FreeIPA."""
-    client = create_client()
+async def set_user_groups(username: str, groups: list[str]) -> list[OperationResult]:
+    """
+    Update a members groups to the provided list in a single batch.
+
+    Any managed groups not specified will be removed from the user.
+    """
+    user = await get_user(username)
 
-    client.user_mod(username, o_nsaccountlock=True)
+    memberof_groups = user.get("result", {}).get("memberof_group", [])
 
+    return await batch(group_operations(username, groups, memberof_groups))
 
-def activate_user(username: str) -> None:
-    """Activate a user in FreeIPA."""
-    client = create_client()
 
-    client.user_mod(username, o_nsaccountlock=False)
+async def deactivate_user(username: str) -> None:
+    """Deactivate a user in FreeIPA."""
+    await _run("user_mod", username, o_nsaccountlock=True)
 
 
-def create_user(username: str, display_name: str, groups: list[str], discord_id: int) -> str:
-    """
-    Create a new user in FreeIPA. If the user exists, the password is reset and returned.
+async def activate_user(username: str) -> None:
+    """Activate a user in FreeIPA."""
+    await _run("user_mod", username, o_nsaccountlock=False)
 
-    Returns the new user password on success.
+
+async def create_user(username: str, display_name: str, groups: list[str], discord_id: int) -> str:
     """
-    client = create_client()
+    Create a new user in FreeIPA and add them to their groups.
 
+    The group additions are only sent, as a single batch, once the user has been created, so a
+    username that already belongs to someone else is never granted groups. Raises
+    `FreeIPAError` if the user could not be created. Returns the new user password on success.
+    """
     pw = token_urlsafe(PW_LENGTH)
 
-    client.user_add(
-        username,
-        o_givenname=display_name,
-        o_cn=display_name,
-        o_sn=display_name,
-        o_displayname=display_name,
-        o_userpassword=pw,
-        o_employeenumber=discord_id,
+    user_add = Operation(
+        "user_add",
+        [username],
+        {
+            "givenname": display_name,
+            "cn": display_name,
+            "sn": display_name,
+            "displayname": display_name,
+            "userpassword": pw,
+            "employeenumber": str(discord_id),
+        },
     )
+    (created,) = await batch([user_add])
+    if created.error:
+        raise FreeIPAError(message=created.error)
 
-    for group in groups:
-        client.group_add_member(group, o_user=[username])
+    for result in await batch([add_group_member(group, username) for group in groups]):
+        if result.error:
+            logger.warning(f"FreeIPA: Operation `{result.operation}` failed: {result.error}")
 
     return pw
 
 
-def delete_user(username: str) -> None:
+async def delete_user(username: str) -> None:
     """Delete a user from FreeIPA."""
-    client = create_client()
-
-    client.user_del(username)
+    await _run("user_del", username)
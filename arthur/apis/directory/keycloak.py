@@ -1,14 +1,24 @@
 """Utilities for interacting with the Keycloak REST API."""
 
 import asyncio
+import time
+from dataclasses import dataclass
 from functools import cache
+from typing import TYPE_CHECKING
 
 from keycloak import KeycloakAdmin, urls_patterns
 from keycloak.exceptions import KeycloakGetError, raise_error_from_response
 
 from arthur.config import CONFIG
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator
 
 MAX_KEYCLOAK_CONCURRENCY = 20
+USERS_PAGE_SIZE = 100
+FULL_IDENTITY_SCAN_INTERVAL_SECONDS = 6 * 60 * 60
+ROLLING_IDENTITY_REFRESH_SIZE = 50
 
 
 @cache
@@ -86,40 +96,164 @@ async def get_user_github_id(username: str) -> str | None:
     return github_id
 
 
-async def _fetch_user_github_identity(
-    client: KeycloakAdmin, user: dict, semaphore: asyncio.Semaphore
-) -> tuple[str, dict[str, str] | None]:
+async def iter_users(
+    client: KeycloakAdmin,
+    page_size: int = USERS_PAGE_SIZE,
+    *,
+    brief: bool = True,
+) -> AsyncIterator[dict]:
+    """
+    Yield every user in the realm, fetching one page at a time.
+
+    With `brief` set, Keycloak returns the brief representation, which omits attributes.
+    """
+    first = 0
+    while True:
+        page = await client.a_get_users(
+            {"first": first, "max": page_size, "briefRepresentation": brief}
+        )
+        for user in page:
+            yield user
+
+        if len(page) < page_size:
+            return
+        first += page_size
+
+
+async def _fetch_user_github_identity(client: KeycloakAdmin, user: dict) -> dict[str, str] | None:
     """Fetch federated identities for a single user and return their GitHub identity if found."""
     url = urls_patterns.URL_ADMIN_USER_FEDERATED_IDENTITIES.format(
         **{"realm-name": client.connection.realm_name, "id": user["id"]}
     )
-    async with semaphore:
-        response = await client.connection.a_raw_get(url)
-        identities = raise_error_from_response(
-            response,
-            KeycloakGetError,
-        )
+    response = await client.connection.a_raw_get(url)
+    identities = raise_error_from_response(
+        response,
+        KeycloakGetError,
+    )
 
     for ident in identities:
         if ident["identityProvider"] == "github":
-            return user["username"], {
+            return {
                 "user_id": ident.get("userId", ""),
                 "user_name": ident.get("userName", ""),
             }
-    return user["username"], None
+    return None
 
 
-async def all_github_identities() -> dict[str, dict[str, str]]:
-    """Fetch Keycloak usernames and their linked GitHub identity information."""
-    client = create_client()
-    users = await client.a_get_users()
+async def _fetch_github_identities(
+    client: KeycloakAdmin, users: AsyncIterable[dict]
+) -> list[tuple[dict, dict[str, str] | None]]:
+    """
+    Fetch the GitHub identity of each user as they are listed.
 
+    At most `MAX_KEYCLOAK_CONCURRENCY` fetches run at once, and listing further users waits
+    until one of them finishes.
+    """
     semaphore = asyncio.Semaphore(MAX_KEYCLOAK_CONCURRENCY)
-    tasks = [_fetch_user_github_identity(client, user, semaphore) for user in users]
 
-    results = await asyncio.gather(*tasks)
+    async def fetch(user: dict) -> tuple[dict, dict[str, str] | None]:
+        try:
+            return user, await _fetch_user_github_identity(client, user)
+        finally:
+            semaphore.release()
+
+    tasks = []
+    try:
+        async for user in users:
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(fetch(user)))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return await asyncio.gather(*tasks)
+
 
-    return {username: identity for username, identity in results if identity}
+async def all_github_identities() -> dict[str, dict[str, str]]:
+    """Fetch Keycloak usernames and their linked GitHub identity information."""
+    client = create_client()
+    results = await _fetch_github_identities(client, iter_users(client))
+
+    return {user["username"]: identity for user, identity in results if identity}
+
+
+@dataclass
+class _CachedIdentity:
+    username: str
+    identity: dict[str, str] | None
+    refreshed_at: float
+
+
+class GitHubIdentityCache:
+    """
+    Keycloak usernames and their linked GitHub identities, refreshed incrementally.
+
+    Each refresh lists the realm's users, but only fetches federated identities for users that
+    are new, have been invalidated, or are among the `ROLLING_IDENTITY_REFRESH_SIZE` least
+    recently refreshed. Every user is re-fetched at least once per
+    `FULL_IDENTITY_SCAN_INTERVAL_SECONDS` to catch links changed outside the bot.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _CachedIdentity] = {}
+        self._invalidated: set[str] = set()
+        self._last_full_scan: float | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, user_id: str) -> None:
+        """Re-fetch a Keycloak user's identities on the next refresh."""
+        self._invalidated.add(user_id)
+
+    async def get(self) -> dict[str, dict[str, str]]:
+        """Refresh the cache and return Keycloak usernames and their linked GitHub identity."""
+        async with self._lock:
+            client = create_client()
+            now = time.monotonic()
+            full_scan = (
+                self._last_full_scan is None
+                or now - self._last_full_scan > FULL_IDENTITY_SCAN_INTERVAL_SECONDS
+            )
+            rolling = set(
+                sorted(self._entries, key=lambda user_id: self._entries[user_id].refreshed_at)[
+                    :ROLLING_IDENTITY_REFRESH_SIZE
+                ]
+            )
+            usernames: dict[str, str] = {}
+
+            async def users_to_refresh() -> AsyncIterator[dict]:
+                async for user in iter_users(client):
+                    usernames[user["id"]] = user["username"]
+                    if (
+                        full_scan
+                        or user["id"] not in self._entries
+                        or user["id"] in self._invalidated
+                        or user["id"] in rolling
+                    ):
+                        yield user
+
+            results = await _fetch_github_identities(client, users_to_refresh())
+            for user, identity in results:
+                self._entries[user["id"]] = _CachedIdentity(user["username"], identity, now)
+
+            for user_id in self._entries.keys() - usernames.keys():
+                del self._entries[user_id]
+            # Usernames can change without the linked identities changing.
+            for user_id, username in usernames.items():
+                self._entries[user_id].username = username
+
+            self._invalidated -= {user["id"] for user, _ in results}
+            self._invalidated &= usernames.keys()
+            if full_scan:
+                self._last_full_scan = now
+
+            logger.debug(
+                f"Keycloak: Refreshed GitHub identities for {len(results)} of {len(usernames)} "
+                f"users{' (full scan)' if full_scan else ''}."
+            )
+            return {
+                entry.username: entry.identity for entry in self._entries.values() if entry.identity
+            }
 
 
 async def all_github_ids() -> list[str]:
@@ -1,10 +1,20 @@
 """API utilities for fetching data from the LDAP directory."""
 
+import asyncio
+import time
 from dataclasses import dataclass
 from functools import cache
+from typing import Any, TYPE_CHECKING
 
 try:
-    from bonsai import LDAPClient, LDAPDN, LDAPSearchScope
+    from bonsai import (
+        ConnectionError as LDAPConnectionError,
+        LDAPClient,
+        LDAPDN,
+        LDAPError,
+        LDAPSearchScope,
+        escape_filter_exp,
+    )
 
     BONSAI_AVAILABLE = True
 except ImportError:
@@ -12,6 +22,16 @@ except ImportError:
 
 from arthur.config import CONFIG
 from arthur.constants import LDAP_ROLE_MAPPING
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+MAX_POOL_SIZE = 4
+# Slightly longer than the LDAP cog's sync interval, which refreshes the user index.
+USER_INDEX_MAX_AGE_SECONDS = 15 * 60
+# Connections left idle for longer than this are checked with a WHOAMI before being reused.
+IDLE_HEALTH_CHECK_SECONDS = 60
 
 
 @dataclass
@@ -50,59 +70,95 @@ def create_client() -> LDAPClient:
     return client
 
 
-async def find_users() -> list[LDAPUser]:
-    """Find all users in the LDAP directory."""
-    client = create_client()
-
-    found_users = []
-
-    async with client.connect(is_async=True) as conn:
-        users = await conn.search(
-            prepare_dn("cn=users,cn=accounts"),
-            LDAPSearchScope.SUBTREE,
-            "(mail=*@pydis.wtf)",
-            ["uid", "employeeNumber", "displayName", "memberOf", "nsAccountLock"],
-        )
-
-        for user in users:
-            groups = user.get("memberOf", ())
-            parsed_groups = []
+class LDAPConnectionPool:
+    """
+    A pool of bound connections to the LDAP server, re-used across searches.
 
-            for group in groups:
-                g_name = get_cn(group)
-                if g_name in LDAP_ROLE_MAPPING:
-                    parsed_groups.append(g_name)
+    At most `max_size` connections are open at once. Searches that fail because the connection
+    dropped are retried once on a fresh connection.
+    """
 
-            new_user = LDAPUser(
-                uid=user["uid"][0],
-                employee_number=user.get("employeeNumber", [None])[0],
-                display_name=user["displayName"][0],
-                groups=parsed_groups,
-                locked=user.get("nsAccountLock", [False])[0],
-            )
+    def __init__(self, client: LDAPClient, max_size: int = MAX_POOL_SIZE) -> None:
+        self._client = client
+        self._slots = asyncio.Semaphore(max_size)
+        # Idle connections and when they were last used.
+        self._idle: list[tuple[Any, float]] = []
+
+    async def _acquire(self) -> Any:
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            if conn.closed:
+                continue
+
+            if time.monotonic() - last_used < IDLE_HEALTH_CHECK_SECONDS:
+                return conn
+
+            try:
+                await conn.whoami()
+            except LDAPError:
+                logger.debug("LDAP: Dropping pooled connection that failed its health check.")
+                conn.close()
+                continue
+            return conn
+
+        return await self._client.connect(is_async=True)
+
+    def _release(self, conn: Any) -> None:
+        if not conn.closed:
+            self._idle.append((conn, time.monotonic()))
+
+    async def _search_on(self, conn: Any, *args: Any) -> list:
+        try:
+            result = await conn.search(*args)
+        except LDAPConnectionError:
+            conn.close()
+            raise
+        except LDAPError:
+            # The server rejected the search, but the connection itself is still usable.
+            self._release(conn)
+            raise
+        except BaseException:
+            # Cancelled mid-search, so the connection may still have a response in flight.
+            conn.close()
+            raise
+
+        self._release(conn)
+        return result
+
+    async def search(
+        self, base: str, scope: LDAPSearchScope, filter_exp: str, attrlist: list[str]
+    ) -> list:
+        """Run a search on a pooled connection, reconnecting once if the connection was lost."""
+        async with self._slots:
+            try:
+                return await self._search_on(
+                    await self._acquire(), base, scope, filter_exp, attrlist
+                )
+            except LDAPConnectionError:
+                logger.info("LDAP: Connection lost, retrying search on a new connection.")
+
+            conn = await self._client.connect(is_async=True)
+            return await self._search_on(conn, base, scope, filter_exp, attrlist)
 
-            found_users.append(new_user)
 
-    return found_users
+@cache
+def get_pool() -> LDAPConnectionPool:
+    """Get the connection pool for the configured LDAP client."""
+    return LDAPConnectionPool(create_client())
 
 
-async def find_by_discord_id(discord_id: int) -> LDAPUser | None:
-    """Find a user in the LDAP directory by their Discord ID."""
-    client = create_client()
-
-    async with client.connect(is_async=True) as conn:
-        users = await conn.search(
-            prepare_dn("cn=users,cn=accounts"),
-            LDAPSearchScope.SUBTREE,
-            f"(employeeNumber={discord_id})",
-            ["uid", "employeeNumber", "displayName", "memberOf"],
-        )
-
-        user = users[0] if users else None
+async def find_users() -> list[LDAPUser]:
+    """Find all users in the LDAP directory."""
+    found_users = []
 
-        if not user:
-            return None
+    users = await get_pool().search(
+        prepare_dn("cn=users,cn=accounts"),
+        LDAPSearchScope.SUBTREE,
+        "(mail=*@pydis.wtf)",
+        ["uid", "employeeNumber", "displayName", "memberOf", "nsAccountLock"],
+    )
 
+    for user in users:
         groups = user.get("memberOf", ())
         parsed_groups = []
 
@@ -111,37 +167,161 @@ async def find_by_discord_id(discord_id: int) -> LDAPUser | None:
             if g_name in LDAP_ROLE_MAPPING:
                 parsed_groups.append(g_name)
 
-        user = LDAPUser(
+        new_user = LDAPUser(
             uid=user["uid"][0],
             employee_number=user.get("employeeNumber", [None])[0],
             display_name=user["displayName"][0],
             groups=parsed_groups,
+            locked=user.get("nsAccountLock", [False])[0],
         )
 
+        found_users.append(new_user)
+
+    return found_users
+
+
+async def find_by_discord_id(discord_id: int) -> LDAPUser | None:
+    """Find a user in the LDAP directory by their Discord ID."""
+    users = await get_pool().search(
+        prepare_dn("cn=users,cn=accounts"),
+        LDAPSearchScope.SUBTREE,
+        f"(employeeNumber={discord_id})",
+        ["uid", "employeeNumber", "displayName", "memberOf"],
+    )
+
+    user = users[0] if users else None
+
+    if not user:
+        return None
+
+    groups = user.get("memberOf", ())
+    parsed_groups = []
+
+    for group in groups:
+        g_name = get_cn(group)
+        if g_name in LDAP_ROLE_MAPPING:
+            parsed_groups.append(g_name)
+
+    user = LDAPUser(
+        uid=user["uid"][0],
+        employee_number=user.get("employeeNumber", [None])[0],
+        display_name=user["displayName"][0],
+        groups=parsed_groups,
+    )
+
+    return user
+
+
+class LDAPUserIndex:
+    """
+    LDAP users keyed by their Discord ID (`employeeNumber`), built from `find_users` results.
+
+    Lookups are answered from memory. If the index has not been refreshed within
+    `USER_INDEX_MAX_AGE_SECONDS`, lookups fall back to searching the directory instead.
+    """
+
+    def __init__(self) -> None:
+        self._users: dict[str, LDAPUser] = {}
+        self._refreshed_at: float | None = None
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the index is too old to answer lookups on its own."""
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at > USER_INDEX_MAX_AGE_SECONDS
+        )
+
+    def __contains__(self, discord_id: int) -> bool:
+        """Whether the index holds a user with this Discord ID, without searching the directory."""
+        return str(discord_id) in self._users
+
+    @property
+    def users(self) -> list[LDAPUser]:
+        """All indexed users, as of the last refresh."""
+        return list(self._users.values())
+
+    def update(self, users: Iterable[LDAPUser]) -> None:
+        """Replace the index with a complete list of users, as returned by `find_users`."""
+        self._users = {user.employee_number: user for user in users if user.employee_number}
+        self._refreshed_at = time.monotonic()
+
+    def add(self, user: LDAPUser) -> None:
+        """Record a single user, such as one that has just been created."""
+        if user.employee_number:
+            self._users[user.employee_number] = user
+
+    async def refresh(self) -> None:
+        """Rebuild the index from the directory."""
+        self.update(await find_users())
+
+    async def get(self, discord_id: int, *, confirm_missing: bool = False) -> LDAPUser | None:
+        """
+        Find a user by their Discord ID.
+
+        If `confirm_missing` is set, users not in the index are searched for in the directory
+        before returning None. This should be used before making changes based on a user not
+        existing, as they may have been created since the index was last refreshed.
+        """
+        if self.is_stale:
+            logger.debug(f"LDAP: User index is stale, searching for {discord_id} directly.")
+            return await find_by_discord_id(discord_id)
+
+        if user := self._users.get(str(discord_id)):
+            return user
+
+        if not confirm_missing:
+            return None
+
+        if user := await find_by_discord_id(discord_id):
+            self.add(user)
         return user
 
 
+@cache
+def get_user_index() -> LDAPUserIndex:
+    """Get the shared index of LDAP users by Discord ID."""
+    return LDAPUserIndex()
+
+
 async def get_group_members(group_name: str) -> list[LDAPUser]:
     """
     Get all members of a group in the LDAP directory.
 
     Users returned by this do not have any fields filled except for their UID.
     """
-    client = create_client()
-
-    async with client.connect(is_async=True) as conn:
-        group = await conn.search(
-            prepare_dn(f"cn={group_name},cn=groups,cn=accounts"),
-            LDAPSearchScope.SUBTREE,
-            "(objectClass=groupOfNames)",
-            ["member"],
-        )
+    return (await get_groups_members([group_name]))[group_name]
 
-        if not group:
-            return []
 
-        members = group[0].get("member", [])
+async def get_groups_members(group_names: Iterable[str]) -> dict[str, list[LDAPUser]]:
+    """
+    Get all members of several groups in the LDAP directory with a single search.
+
+    Groups that do not exist map to an empty list. Users returned by this do not have any fields
+    filled except for their UID.
+    """
+    group_names = list(group_names)
+    members_by_group: dict[str, list[LDAPUser]] = {name: [] for name in group_names}
+    if not group_names:
+        return members_by_group
+
+    # Group names are matched case-insensitively by the directory.
+    names_by_key = {name.casefold(): name for name in group_names}
+    name_filter = "".join(f"(cn={escape_filter_exp(name)})" for name in group_names)
+    groups = await get_pool().search(
+        prepare_dn("cn=groups,cn=accounts"),
+        LDAPSearchScope.SUBTREE,
+        f"(&(objectClass=groupOfNames)(|{name_filter}))",
+        ["cn", "member"],
+    )
+
+    for group in groups:
+        name = names_by_key.get(group["cn"][0].casefold())
+        if name is None:
+            continue
 
-        found_users = [LDAPUser(uid=get_cn(member)) for member in members]
+        members_by_group[name] = [
+            LDAPUser(uid=get_cn(member)) for member in group.get("member", [])
+        ]
 
-        return found_users
+    return members_by_group
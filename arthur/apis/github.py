@@ -1,8 +1,20 @@
+import asyncio
+import base64
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from http import HTTPStatus
+from typing import Any, TYPE_CHECKING
 
 import aiohttp
+from yarl import URL
 
 from arthur.config import CONFIG
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
 
 
 class GitHubError(Exception):
@@ -18,6 +30,221 @@ HEADERS = {
     "Authorization": f"Bearer {CONFIG.github_token.get_secret_value()}",
 }
 
+PER_PAGE = 100
+# What GitHub uses when a request doesn't specify `per_page`.
+DEFAULT_PER_PAGE = 30
+MAX_PAGE_CONCURRENCY = 5
+# Once fewer requests than this remain in the rate limit window, pages are fetched one at a time.
+RATE_LIMIT_LOW_WATERMARK = 100
+MAX_RATE_LIMIT_RETRIES = 3
+# GitHub asks for at least a minute between retries when a rate limit doesn't say how long to wait.
+DEFAULT_RATE_LIMIT_DELAY = 60
+MAX_CACHED_RESPONSES = 1024
+GRAPHQL_ENDPOINT = "https://api.github.com/graphql"
+# The `nodes` GraphQL field accepts at most 100 IDs per query.
+GRAPHQL_NODES_BATCH_SIZE = 100
+
+
+class _RateLimiter:
+    """Track GitHub's rate limit headers and pause all requests while a limit is in effect."""
+
+    def __init__(self) -> None:
+        self.remaining: int | None = None
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        """Sleep until any active rate limit pause has passed."""
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def update(self, response: aiohttp.ClientResponse, attempt: int) -> float | None:
+        """
+        Record the rate limit state reported by a response.
+
+        Returns the number of seconds to wait before retrying if the response was rate limited.
+        Secondary rate limits that don't say how long to wait back off exponentially by attempt.
+        """
+        if (remaining := response.headers.get("X-RateLimit-Remaining")) is not None:
+            self.remaining = int(remaining)
+
+        if response.status not in {HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS}:
+            return None
+
+        if (retry_after := response.headers.get("Retry-After")) is not None:
+            delay = float(retry_after)
+        elif self.remaining == 0 and (reset := response.headers.get("X-RateLimit-Reset")):
+            delay = max(float(reset) - time.time(), 0) + 1
+        elif (
+            response.status == HTTPStatus.TOO_MANY_REQUESTS
+            or "secondary rate limit" in (await response.text()).lower()
+        ):
+            delay = DEFAULT_RATE_LIMIT_DELAY * 2**attempt
+        else:
+            # A plain 403 is a permissions problem, not a rate limit.
+            return None
+
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+
+_rate_limiter = _RateLimiter()
+
+
+@asynccontextmanager
+async def _request(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str | URL,
+    *,
+    headers: dict[str, str] = HEADERS,
+    **kwargs: Any,
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """Send a request to GitHub, waiting out and retrying rate limited responses."""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        await _rate_limiter.wait()
+        async with session.request(method, url, headers=headers, **kwargs) as response:
+            if (delay := await _rate_limiter.update(response, attempt)) is None:
+                yield response
+                return
+
+        if attempt < MAX_RATE_LIMIT_RETRIES - 1:
+            logger.warning(
+                f"GitHub: Rate limited on {method} {URL(url).path}, retrying in {delay:.0f}s."
+            )
+
+    msg = f"Still rate limited after {MAX_RATE_LIMIT_RETRIES} attempts: {method} {URL(url).path}"
+    raise GitHubError(msg)
+
+
+@dataclass(frozen=True)
+class _CachedResponse:
+    """A previously fetched page and the ETag it was served with."""
+
+    etag: str
+    data: Any
+
+
+class ResponseCache:
+    """
+    Cache of GitHub GET responses keyed by URL, revalidated with `If-None-Match`.
+
+    GitHub answers an unchanged resource with 304 Not Modified, which does not count against the
+    rate limit, so a cached page costs nothing to re-read. The hit and miss counters are reset by
+    callers that want per-run figures.
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, _CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> _CachedResponse | None:
+        """Return the cached response for a URL, if there is one."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def store(self, url: str, etag: str, data: Any) -> None:
+        """Cache a response, evicting the least recently used entry once full."""
+        self._entries[url] = _CachedResponse(etag=etag, data=data)
+        self._entries.move_to_end(url)
+        if len(self._entries) > MAX_CACHED_RESPONSES:
+            self._entries.popitem(last=False)
+
+    def reset_counters(self) -> None:
+        """Reset the hit and miss counters."""
+        self.hits = 0
+        self.misses = 0
+
+
+response_cache = ResponseCache()
+
+
+async def _get_page(
+    url: URL, session: aiohttp.ClientSession, *, revalidate: bool = True
+) -> tuple[Any, Any]:
+    """
+    Fetch one page of a list endpoint, returning its data and parsed `Link` header.
+
+    Pages are served from the response cache when GitHub reports them as unchanged. The ETag
+    only covers the page body, so the pagination links always come from the latest response:
+    a list can gain pages without its first page changing.
+    """
+    cached = response_cache.get(str(url)) if revalidate else None
+    headers = HEADERS if cached is None else {**HEADERS, "If-None-Match": cached.etag}
+
+    async with _request(session, "GET", url, headers=headers) as response:
+        if cached is None or response.status != HTTPStatus.NOT_MODIFIED:
+            response.raise_for_status()
+            data = await response.json()
+            response_cache.misses += 1
+            if etag := response.headers.get("ETag"):
+                response_cache.store(str(url), etag, data)
+            return data, response.links
+
+        has_links = "Link" in response.headers
+        links = response.links
+
+    # Without a Link header the page is only known to be the last one if it isn't full, as a
+    # full page may have been followed by new ones since it was cached.
+    per_page = int(url.query.get("per_page", DEFAULT_PER_PAGE))
+    if not has_links and len(cached.data) >= per_page:
+        return await _get_page(url, session, revalidate=False)
+
+    response_cache.hits += 1
+    return cached.data, links
+
+
+async def _get_page_items(
+    url: URL, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore
+) -> list[dict]:
+    """Fetch the items of a single page, bounded by the provided semaphore."""
+    async with semaphore:
+        items, _ = await _get_page(url, session)
+    return items
+
+
+async def _get_paginated(endpoint: str, session: aiohttp.ClientSession) -> list[dict]:
+    """
+    Fetch every item from a paginated GitHub list endpoint.
+
+    The first page is fetched alone to find the last page from the `Link` header, then the
+    remaining pages are fetched concurrently. If the rate limit is running low, or no last page is
+    advertised, `next` links are followed one page at a time instead.
+
+    HTTP errors are raised as `aiohttp.ClientResponseError` for the caller to interpret.
+    """
+    first_page, links = await _get_page(URL(endpoint).update_query(per_page=PER_PAGE), session)
+    # Copy the first page, as the cached page must not be extended in place.
+    items = list(first_page)
+
+    if "next" not in links:
+        return items
+
+    rate_limit_ok = (
+        _rate_limiter.remaining is None or _rate_limiter.remaining > RATE_LIMIT_LOW_WATERMARK
+    )
+    if "last" in links and rate_limit_ok:
+        last_url = links["last"]["url"]
+        semaphore = asyncio.Semaphore(MAX_PAGE_CONCURRENCY)
+        pages = await asyncio.gather(
+            *(
+                _get_page_items(last_url.update_query(page=page), session, semaphore)
+                for page in range(2, int(last_url.query["page"]) + 1)
+            )
+        )
+        for page_items in pages:
+            items.extend(page_items)
+        return items
+
+    while "next" in links:
+        page_items, links = await _get_page(links["next"]["url"], session)
+        items.extend(page_items)
+
+    return items
+
 
 async def remove_org_member(username: str, session: aiohttp.ClientSession) -> None:
     """Remove a user from the GitHub organisation."""
@@ -27,7 +254,7 @@ async def remove_org_member(username: str, session: aiohttp.ClientSession) -> No
 
     endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/members/{username}"
 
-    async with session.delete(endpoint, headers=HEADERS) as resp:
+    async with _request(session, "DELETE", endpoint) as resp:
         try:
             resp.raise_for_status()
         except aiohttp.ClientResponseError as e:
@@ -45,7 +272,7 @@ async def remove_org_member(username: str, session: aiohttp.ClientSession) -> No
 async def add_org_member(username: str, session: aiohttp.ClientSession) -> None:
     """Add a user to the GitHub organisation."""
     endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/memberships/{username}"
-    async with session.put(endpoint, headers=HEADERS, json={"role": "member"}) as response:
+    async with _request(session, "PUT", endpoint, json={"role": "member"}) as response:
         try:
             response.raise_for_status()
         except aiohttp.ClientResponseError as e:
@@ -63,7 +290,7 @@ async def add_org_member(username: str, session: aiohttp.ClientSession) -> None:
 async def get_username_for_user_id(user_id: str, session: aiohttp.ClientSession) -> str | None:
     """Resolve a GitHub login from an account ID."""
     endpoint = f"https://api.github.com/user/{user_id}"
-    async with session.get(endpoint, headers=HEADERS) as response:
+    async with _request(session, "GET", endpoint) as response:
         try:
             response.raise_for_status()
             data = await response.json()
@@ -79,93 +306,59 @@ async def get_username_for_user_id(user_id: str, session: aiohttp.ClientSession)
 
 async def list_organisation_member_identities(session: aiohttp.ClientSession) -> dict[str, str]:
     """List all organisation members as a mapping of account ID to login."""
-    members = {}
-    page = 1
-    per_page = 100
-
-    while True:
-        endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/members?per_page={per_page}&page={page}"
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-                members.update(
-                    {
-                        str(member["id"]): member["login"]
-                        for member in data
-                        if member.get("id") and member.get("login")
-                    }
-                )
-                if len(data) < per_page:
-                    break
-                page += 1
-            except aiohttp.ClientResponseError as e:
-                msg = f"Failed to list organisation member identities: {e.message}"
-                raise GitHubError(msg)
+    endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/members"
+    try:
+        data = await _get_paginated(endpoint, session)
+    except aiohttp.ClientResponseError as e:
+        msg = f"Failed to list organisation member identities: {e.message}"
+        raise GitHubError(msg)
 
-    return members
+    return {
+        str(member["id"]): member["login"]
+        for member in data
+        if member.get("id") and member.get("login")
+    }
 
 
 async def list_pending_org_invitations(session: aiohttp.ClientSession) -> set[str]:
     """List GitHub logins with pending organisation invitations."""
-    pending = set()
-    page = 1
-    per_page = 100
+    endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/invitations"
+    try:
+        data = await _get_paginated(endpoint, session)
+    except aiohttp.ClientResponseError as e:
+        msg = f"Failed to list pending organisation invitations: {e.message}"
+        raise GitHubError(msg)
 
-    while True:
-        endpoint = (
-            f"https://api.github.com/orgs/{CONFIG.github_org}/invitations"
-            f"?per_page={per_page}&page={page}"
-        )
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-                for invitation in data:
-                    login = invitation.get("login") or invitation.get("invitee", {}).get("login")
-                    if login:
-                        pending.add(login)
-
-                if len(data) < per_page:
-                    break
-                page += 1
-            except aiohttp.ClientResponseError as e:
-                msg = f"Failed to list pending organisation invitations: {e.message}"
-                raise GitHubError(msg)
+    pending = set()
+    for invitation in data:
+        login = invitation.get("login") or invitation.get("invitee", {}).get("login")
+        if login:
+            pending.add(login)
 
     return pending
 
 
+async def _list_failed_org_invitation_records(session: aiohttp.ClientSession) -> list[dict]:
+    """List raw failed organisation invitation records."""
+    endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/failed_invitations"
+    try:
+        return await _get_paginated(endpoint, session)
+    except aiohttp.ClientResponseError as e:
+        if e.status == HTTPStatus.NOT_FOUND:
+            # Some org/API versions may not expose failed invitations.
+            return []
+
+        msg = f"Failed to list failed organisation invitations: {e.message}"
+        raise GitHubError(msg)
+
+
 async def list_failed_org_invitations(session: aiohttp.ClientSession) -> set[str]:
     """List GitHub logins with failed organisation invitations."""
     failed = set()
-    page = 1
-    per_page = 100
-
-    while True:
-        endpoint = (
-            f"https://api.github.com/orgs/{CONFIG.github_org}/failed_invitations"
-            f"?per_page={per_page}&page={page}"
-        )
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-                for invitation in data:
-                    login = invitation.get("login") or invitation.get("invitee", {}).get("login")
-                    if login:
-                        failed.add(login)
-
-                if len(data) < per_page:
-                    break
-                page += 1
-            except aiohttp.ClientResponseError as e:
-                if e.status == HTTPStatus.NOT_FOUND:
-                    # Some org/API versions may not expose failed invitations.
-                    return failed
-
-                msg = f"Failed to list failed organisation invitations: {e.message}"
-                raise GitHubError(msg)
+    for invitation in await _list_failed_org_invitation_records(session):
+        login = invitation.get("login") or invitation.get("invitee", {}).get("login")
+        if login:
+            failed.add(login)
 
     return failed
 
@@ -185,35 +378,12 @@ async def _find_failed_org_invitation_id(
     session: aiohttp.ClientSession,
 ) -> int | None:
     """Find failed org invitation ID for a GitHub login."""
-    page = 1
-    per_page = 100
-
-    while True:
-        endpoint = (
-            f"https://api.github.com/orgs/{CONFIG.github_org}/failed_invitations"
-            f"?per_page={per_page}&page={page}"
-        )
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-            except aiohttp.ClientResponseError as e:
-                if e.status == HTTPStatus.NOT_FOUND:
-                    # Some org/API versions may not expose failed invitations.
-                    return None
-
-                msg = f"Failed to list failed organisation invitations: {e.message}"
-                raise GitHubError(msg)
-
-        for invitation in data:
-            login = invitation.get("login") or invitation.get("invitee", {}).get("login")
-            if login and login.casefold() == username.casefold():
-                return _extract_invitation_id(invitation)
-
-        if len(data) < per_page:
-            return None
+    for invitation in await _list_failed_org_invitation_records(session):
+        login = invitation.get("login") or invitation.get("invitee", {}).get("login")
+        if login and login.casefold() == username.casefold():
+            return _extract_invitation_id(invitation)
 
-        page += 1
+    return None
 
 
 async def remove_failed_org_invitation(username: str, session: aiohttp.ClientSession) -> None:
@@ -224,7 +394,7 @@ async def remove_failed_org_invitation(username: str, session: aiohttp.ClientSes
         return
 
     endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/invitations/{invitation_id}"
-    async with session.delete(endpoint, headers=HEADERS) as response:
+    async with _request(session, "DELETE", endpoint) as response:
         try:
             response.raise_for_status()
         except aiohttp.ClientResponseError as e:
@@ -247,7 +417,7 @@ async def add_member_to_team(
 ) -> None:
     """Add a user to a GitHub team."""
     endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/teams/{github_team_slug}/memberships/{username}"
-    async with session.put(endpoint, headers=HEADERS) as response:
+    async with _request(session, "PUT", endpoint) as response:
         try:
             response.raise_for_status()
             return await response.json()
@@ -268,28 +438,14 @@ async def add_member_to_team(
 
 async def list_team_members(github_team_slug: str, session: aiohttp.ClientSession) -> list[str]:
     """List all members of a GitHub team, and handle pagination."""
-    members = []
-    page = 1
-    per_page = 100
-
-    while True:
-        endpoint = (
-            f"https://api.github.com/orgs/{CONFIG.github_org}/teams/{github_team_slug}"
-            f"/members?per_page={per_page}&page={page}"
-        )
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-                members.extend([member["login"] for member in data])
-                if len(data) < per_page:
-                    break
-                page += 1
-            except aiohttp.ClientResponseError as e:
-                msg = f"Failed to list team members for {github_team_slug}: {e.message}"
-                raise GitHubError(msg)
+    endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/teams/{github_team_slug}/members"
+    try:
+        data = await _get_paginated(endpoint, session)
+    except aiohttp.ClientResponseError as e:
+        msg = f"Failed to list team members for {github_team_slug}: {e.message}"
+        raise GitHubError(msg)
 
-    return members
+    return [member["login"] for member in data]
 
 
 async def remove_member_from_team(
@@ -297,7 +453,7 @@ async def remove_member_from_team(
 ) -> None:
     """Remove a user from a GitHub team."""
     endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/teams/{github_team_slug}/memberships/{username}"
-    async with session.delete(endpoint, headers=HEADERS) as response:
+    async with _request(session, "DELETE", endpoint) as response:
         try:
             response.raise_for_status()
         except aiohttp.ClientResponseError as e:
@@ -314,22 +470,161 @@ async def remove_member_from_team(
 
 async def list_organisation_members(session: aiohttp.ClientSession) -> list[str]:
     """List all members of the GitHub organisation, and handle pagination."""
-    members = []
-    page = 1
-    per_page = 100
-
-    while True:
-        endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/members?per_page={per_page}&page={page}"
-        async with session.get(endpoint, headers=HEADERS) as response:
-            try:
-                response.raise_for_status()
-                data = await response.json()
-                members.extend([member["login"] for member in data])
-                if len(data) < per_page:
-                    break
-                page += 1
-            except aiohttp.ClientResponseError as e:
-                msg = f"Failed to list organisation members: {e.message}"
+    endpoint = f"https://api.github.com/orgs/{CONFIG.github_org}/members"
+    try:
+        data = await _get_paginated(endpoint, session)
+    except aiohttp.ClientResponseError as e:
+        msg = f"Failed to list organisation members: {e.message}"
+        raise GitHubError(msg)
+
+    return [member["login"] for member in data]
+
+
+@dataclass(frozen=True)
+class MembershipSnapshot:
+    """Organisation and team membership fetched in bulk over GraphQL."""
+
+    org_members_by_id: dict[str, str]
+    team_members: dict[str, list[str]]
+
+
+async def _graphql(query: str, variables: dict[str, Any], session: aiohttp.ClientSession) -> dict:
+    """Run a GraphQL query and return its data, raising GitHubError if no data was returned."""
+    payload = {"query": query, "variables": variables}
+
+    async with _request(session, "POST", GRAPHQL_ENDPOINT, json=payload) as response:
+        try:
+            response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            msg = f"GraphQL request failed: {e.message}"
+            raise GitHubError(msg)
+
+        body = await response.json()
+
+    errors = body.get("errors") or []
+    if body.get("data") is None:
+        msg = "GraphQL query failed: " + "; ".join(error.get("message", "") for error in errors)
+        raise GitHubError(msg)
+
+    if errors:
+        logger.debug(f"GitHub: GraphQL query returned partial errors: {errors}")
+
+    return body["data"]
+
+
+def _membership_query(
+    members_cursor: str | None,
+    team_cursors: dict[str, str | None],
+    *,
+    fetch_members: bool,
+) -> tuple[str, dict[str, Any], dict[str, str]]:
+    """
+    Build one query for the next page of every membership connection still being fetched.
+
+    Returns the query, its variables and a mapping of team field alias to team slug.
+    """
+    page_fields = "pageInfo { hasNextPage endCursor } nodes { databaseId login }"
+    declarations = ["$org: String!"]
+    variables: dict[str, Any] = {"org": CONFIG.github_org}
+    fields = []
+    aliases = {}
+
+    if fetch_members:
+        declarations.append("$membersCursor: String")
+        variables["membersCursor"] = members_cursor
+        fields.append(
+            f"members: membersWithRole(first: {PER_PAGE}, after: $membersCursor) {{ {page_fields} }}"
+        )
+
+    for index, (slug, cursor) in enumerate(team_cursors.items()):
+        alias = f"team{index}"
+        aliases[alias] = slug
+        declarations += [f"${alias}Slug: String!", f"${alias}Cursor: String"]
+        variables[f"{alias}Slug"] = slug
+        variables[f"{alias}Cursor"] = cursor
+        fields.append(
+            f"{alias}: team(slug: ${alias}Slug) {{ "
+            f"members(first: {PER_PAGE}, after: ${alias}Cursor) {{ {page_fields} }} }}"
+        )
+
+    query = (
+        f"query({', '.join(declarations)}) {{ organization(login: $org) {{ {' '.join(fields)} }} }}"
+    )
+    return query, variables, aliases
+
+
+async def fetch_membership_snapshot(
+    team_slugs: Iterable[str], session: aiohttp.ClientSession
+) -> MembershipSnapshot:
+    """
+    Fetch organisation members and the members of the given teams over GraphQL.
+
+    Every connection is paginated within the same query, so this takes as many requests as the
+    longest connection has pages, rather than one request per page of every list.
+    """
+    org_members_by_id = {}
+    team_members: dict[str, list[str]] = {slug: [] for slug in team_slugs}
+
+    fetch_members = True
+    members_cursor = None
+    # Teams that still have pages to fetch, mapped to the cursor to resume from.
+    team_cursors: dict[str, str | None] = dict.fromkeys(team_members)
+
+    while fetch_members or team_cursors:
+        query, variables, aliases = _membership_query(
+            members_cursor, team_cursors, fetch_members=fetch_members
+        )
+        organization = (await _graphql(query, variables, session))["organization"]
+        if organization is None:
+            msg = f"Organisation {CONFIG.github_org} not found over GraphQL"
+            raise GitHubError(msg)
+
+        if fetch_members:
+            connection = organization["members"]
+            for node in connection["nodes"]:
+                org_members_by_id[str(node["databaseId"])] = node["login"]
+            fetch_members = connection["pageInfo"]["hasNextPage"]
+            members_cursor = connection["pageInfo"]["endCursor"]
+
+        for alias, slug in aliases.items():
+            if organization[alias] is None:
+                msg = f"Team {slug} not found over GraphQL"
                 raise GitHubError(msg)
 
-    return members
+            connection = organization[alias]["members"]
+            team_members[slug].extend(node["login"] for node in connection["nodes"])
+            if connection["pageInfo"]["hasNextPage"]:
+                team_cursors[slug] = connection["pageInfo"]["endCursor"]
+            else:
+                del team_cursors[slug]
+
+    return MembershipSnapshot(org_members_by_id=org_members_by_id, team_members=team_members)
+
+
+def _legacy_user_node_id(user_id: str) -> str:
+    """Convert a GitHub account ID into the legacy global node ID GraphQL still accepts."""
+    return base64.b64encode(f"04:User{user_id}".encode()).decode()
+
+
+async def resolve_logins_by_user_id(
+    user_ids: Iterable[str], session: aiohttp.ClientSession
+) -> dict[str, str]:
+    """
+    Resolve GitHub account IDs to their current logins in batches over GraphQL.
+
+    IDs that do not belong to an existing user are left out of the result.
+    """
+    query = "query($ids: [ID!]!) { nodes(ids: $ids) { ... on User { databaseId login } } }"
+    ordered_ids = sorted(set(user_ids))
+    resolved = {}
+
+    for start in range(0, len(ordered_ids), GRAPHQL_NODES_BATCH_SIZE):
+        batch = ordered_ids[start : start + GRAPHQL_NODES_BATCH_SIZE]
+        data = await _graphql(
+            query, {"ids": [_legacy_user_node_id(user_id) for user_id in batch]}, session
+        )
+        for node in data["nodes"]:
+            if node and node.get("databaseId") and node.get("login"):
+                resolved[str(node["databaseId"])] = node["login"]
+
+    return resolved
@@ -1,6 +1,8 @@
 from .teams import (
     add_user_to_team,
     get_all_users,
+    iter_org_users,
+    iter_teams,
     list_team_members,
     list_teams,
     remove_user_from_team,
@@ -9,6 +11,8 @@ from .teams import (
 __all__ = (
     "add_user_to_team",
     "get_all_users",
+    "iter_org_users",
+    "iter_teams",
     "list_team_members",
     "list_teams",
     "remove_user_from_team",
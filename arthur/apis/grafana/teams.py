@@ -1,21 +1,110 @@
-from typing import TYPE_CHECKING
+import asyncio
+from http import HTTPStatus
+from typing import Any, TYPE_CHECKING
 
 from arthur.config import CONFIG
+from arthur.log import logger
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
     import aiohttp
 
 if CONFIG.grafana_token:
     AUTH_HEADER = {"Authorization": f"Bearer {CONFIG.grafana_token.get_secret_value()}"}
 
+PER_PAGE = 100
+MAX_MUTATION_RETRIES = 3
+DEFAULT_RETRY_DELAY_SECONDS = 1
+
+# Bounds how many membership changes are in flight at once, across all teams being synced.
+_mutation_semaphore = asyncio.Semaphore(CONFIG.grafana_mutation_concurrency)
+
+
+def _retry_delay(response: aiohttp.ClientResponse, attempt: int) -> float | None:
+    """Return how long to wait before retrying a response, or None if it shouldn't be retried."""
+    if (
+        response.status != HTTPStatus.TOO_MANY_REQUESTS
+        and response.status < HTTPStatus.INTERNAL_SERVER_ERROR
+    ):
+        return None
+
+    try:
+        return float(response.headers["Retry-After"])
+    except KeyError, ValueError:
+        return DEFAULT_RETRY_DELAY_SECONDS * 2**attempt
+
+
+async def _mutate(
+    method: str,
+    endpoint: str,
+    session: aiohttp.ClientSession,
+    **kwargs: Any,
+) -> dict[str, str]:
+    """
+    Send a change to Grafana, retrying rate limited and server error responses.
+
+    The concurrency slot is only held whilst a request is in flight, not whilst backing off.
+    """
+    attempt = 0
+    while True:
+        async with (
+            _mutation_semaphore,
+            session.request(method, endpoint, headers=AUTH_HEADER, **kwargs) as response,
+        ):
+            delay = _retry_delay(response, attempt) if attempt < MAX_MUTATION_RETRIES else None
+            if delay is None:
+                response.raise_for_status()
+                return await response.json()
+
+        logger.debug(
+            f"Grafana: {method} {endpoint} returned {response.status}, retrying in {delay}s."
+        )
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _iter_search(
+    path: str,
+    key: str,
+    session: aiohttp.ClientSession,
+    per_page: int,
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield every result of a paginated Grafana search endpoint, one page at a time."""
+    endpoint = CONFIG.grafana_url + path
+    page = 1
+    while True:
+        params = {"perpage": per_page, "page": page}
+        async with session.get(endpoint, headers=AUTH_HEADER, params=params) as response:
+            response.raise_for_status()
+            body = await response.json()
+
+        results = body[key] or []
+        for result in results:
+            yield result
 
-async def list_teams(session: aiohttp.ClientSession) -> dict[str, str]:
+        if len(results) < per_page or page * per_page >= body.get("totalCount", 0):
+            return
+        page += 1
+
+
+def iter_teams(
+    session: aiohttp.ClientSession, per_page: int = PER_PAGE
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield every Grafana team, fetching one page at a time."""
+    return _iter_search("/api/teams/search", "teams", session, per_page)
+
+
+def iter_org_users(
+    session: aiohttp.ClientSession, per_page: int = PER_PAGE
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield every user in the Grafana org, fetching one page at a time."""
+    return _iter_search("/api/org/users/search", "orgUsers", session, per_page)
+
+
+async def list_teams(session: aiohttp.ClientSession) -> list[dict[str, str]]:
     """List all Grafana teams."""
-    endpoint = CONFIG.grafana_url + "/api/teams/search"
-    async with session.get(endpoint, headers=AUTH_HEADER) as response:
-        response.raise_for_status()
-        teams = await response.json()
-    return teams["teams"]
+    return [team async for team in iter_teams(session)]
 
 
 async def list_team_members(team_id: int, session: aiohttp.ClientSession) -> list[dict[str, str]]:
@@ -34,9 +123,7 @@ async def add_user_to_team(
     """Add a Grafana user to a team."""
     endpoint = CONFIG.grafana_url + f"/api/teams/{team_id}/members"
     payload = {"userId": user_id}
-    async with session.post(endpoint, headers=AUTH_HEADER, json=payload) as response:
-        response.raise_for_status()
-        return await response.json()
+    return await _mutate("POST", endpoint, session, json=payload)
 
 
 async def remove_user_from_team(
@@ -46,14 +133,9 @@ async def remove_user_from_team(
 ) -> dict[str, str]:
     """Remove a Grafana user from a team."""
     endpoint = CONFIG.grafana_url + f"/api/teams/{team_id}/members/{user_id}"
-    async with session.delete(endpoint, headers=AUTH_HEADER) as response:
-        response.raise_for_status()
-        return await response.json()
+    return await _mutate("DELETE", endpoint, session)
 
 
 async def get_all_users(session: aiohttp.ClientSession) -> list[dict[str, str]]:
     """Get all Grafana users."""
-    endpoint = CONFIG.grafana_url + "/api/org/users"
-    async with session.get(endpoint, headers=AUTH_HEADER) as response:
-        response.raise_for_status()
-        return await response.json()
+    return [user async for user in iter_org_users(session)]
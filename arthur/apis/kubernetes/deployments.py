@@ -1,11 +1,13 @@
 """APIs for working with Kubernetes deployments."""
 
 from datetime import UTC, datetime
+from functools import cache
 from typing import TYPE_CHECKING
 
 from kubernetes_asyncio import client
 
 from arthur.apis.kubernetes import get_api_client
+from arthur.apis.kubernetes.informer import Informer
 
 if TYPE_CHECKING:
     from kubernetes_asyncio.client.models import V1DeploymentList
@@ -32,7 +34,13 @@ async def restart_deployment(deployment: str, namespace: str) -> None:
     )
 
 
-async def list_deployments(namespace: str) -> V1DeploymentList:
-    """Query the Kubernetes API for a list of deployments in the provided namespace."""
+@cache
+def get_deployment_informer() -> Informer:
+    """Return the shared deployment informer, creating it on first call."""
     api = client.AppsV1Api(get_api_client())
-    return await api.list_namespaced_deployment(namespace=namespace)
+    return Informer("deployments", api.list_deployment_for_all_namespaces)
+
+
+async def list_deployments(namespace: str) -> V1DeploymentList:
+    """Return the deployments in the provided namespace from the informer cache."""
+    return await get_deployment_informer().list(namespace)
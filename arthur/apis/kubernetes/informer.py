@@ -0,0 +1,140 @@
+"""Watch-backed in-memory caches of Kubernetes resources."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+from typing import Any, TYPE_CHECKING
+
+from kubernetes_asyncio import watch
+from kubernetes_asyncio.client.models import V1ListMeta
+from kubernetes_asyncio.client.rest import ApiException
+
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+WATCH_TIMEOUT_SECONDS = 300
+WATCH_RETRY_DELAY_SECONDS = 5
+# Data older than this is treated as unreliable and re-listed before being served.
+MAX_STALENESS = timedelta(minutes=10)
+
+
+class Informer:
+    """
+    An in-memory copy of a Kubernetes resource, kept up to date with WATCH streams.
+
+    The first read performs a single LIST, after which changes are followed from that LIST's
+    resourceVersion. If the API server reports the resourceVersion as expired (410 Gone), the
+    cache is rebuilt with a fresh LIST.
+    """
+
+    def __init__(self, kind: str, list_func: Callable[..., Awaitable[Any]]) -> None:
+        self.kind = kind
+        self.synced_at: datetime | None = None
+
+        self._list_func = list_func
+        self._list_type: type | None = None
+        self._objects: dict[str, Any] = {}
+        self._resource_version: str | None = None
+        self._lock = asyncio.Lock()
+        self._watch_task: asyncio.Task | None = None
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the cache has not heard from the API server recently enough to be trusted."""
+        return self.synced_at is None or datetime.now(UTC) - self.synced_at > MAX_STALENESS
+
+    @staticmethod
+    def _key(namespace: str | None, name: str) -> str:
+        return f"{namespace or ''}/{name}"
+
+    async def list(self, namespace: str | None = None) -> Any:
+        """Return the cached objects as the API's list model, optionally filtered by namespace."""
+        if self.is_stale:
+            await self._resync()
+
+        items = sorted(
+            (
+                obj
+                for obj in self._objects.values()
+                if namespace is None or obj.metadata.namespace == namespace
+            ),
+            key=lambda obj: (obj.metadata.namespace or "", obj.metadata.name),
+        )
+        return self._list_type(
+            items=items, metadata=V1ListMeta(resource_version=self._resource_version)
+        )
+
+    async def _resync(self) -> None:
+        """Re-list the resource and make sure the watch task is running."""
+        async with self._lock:
+            # Another caller may have resynced whilst we were waiting for the lock.
+            if not self.is_stale:
+                return
+
+            await self._relist()
+
+            if self._watch_task is None or self._watch_task.done():
+                self._watch_task = asyncio.create_task(
+                    self._watch(), name=f"kubernetes-informer-{self.kind}"
+                )
+
+    async def _relist(self) -> None:
+        result = await self._list_func()
+
+        self._list_type = type(result)
+        self._objects = {
+            self._key(obj.metadata.namespace, obj.metadata.name): obj for obj in result.items
+        }
+        self._resource_version = result.metadata.resource_version
+        self.synced_at = datetime.now(UTC)
+        logger.debug(f"Kubernetes: Listed {len(self._objects)} {self.kind}.")
+
+    def _apply_event(self, event: dict[str, Any]) -> None:
+        raw_object = event["raw_object"]
+        if event["type"] == "ERROR":
+            raise ApiException(status=raw_object.get("code"), reason=raw_object.get("reason"))
+
+        metadata = raw_object["metadata"]
+        # Bookmarks carry nothing but a newer resourceVersion to resume from.
+        if event["type"] != "BOOKMARK":
+            key = self._key(metadata.get("namespace"), metadata["name"])
+            if event["type"] == "DELETED":
+                self._objects.pop(key, None)
+            else:
+                self._objects[key] = event["object"]
+
+        self._resource_version = metadata["resourceVersion"]
+        self.synced_at = datetime.now(UTC)
+
+    async def _watch(self) -> None:
+        """Follow changes to the resource until cancelled."""
+        while True:
+            try:
+                if self._resource_version is None:
+                    await self._relist()
+
+                async with watch.Watch().stream(
+                    self._list_func,
+                    resource_version=self._resource_version,
+                    timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                    allow_watch_bookmarks=True,
+                    _request_timeout=WATCH_TIMEOUT_SECONDS + 30,
+                ) as stream:
+                    async for event in stream:
+                        self._apply_event(event)
+
+                # The server closed the stream cleanly, so nothing was missed up to now.
+                self.synced_at = datetime.now(UTC)
+            except ApiException as e:
+                if e.status == HTTPStatus.GONE:
+                    logger.info(f"Kubernetes: {self.kind} watch expired, re-listing.")
+                    self._resource_version = None
+                    continue
+
+                logger.opt(exception=e).warning(f"Kubernetes: {self.kind} watch failed.")
+                await asyncio.sleep(WATCH_RETRY_DELAY_SECONDS)
+            except Exception as e:  # noqa: BLE001
+                logger.opt(exception=e).warning(f"Kubernetes: {self.kind} watch failed.")
+                await asyncio.sleep(WATCH_RETRY_DELAY_SECONDS)
@@ -1,19 +1,25 @@
 """APIs for interacting with Kubernetes Jobs & Cronjobs."""
 
+from functools import cache
 from typing import Any
 
 from kubernetes_asyncio import client
 from kubernetes_asyncio.client.models import V1CronJob, V1CronJobList, V1Job
 
 from arthur.apis.kubernetes import get_api_client
+from arthur.apis.kubernetes.informer import Informer
 
 
-async def list_cronjobs(namespace: str | None = None) -> V1CronJobList:
-    """Query the Kubernetes API for a list of cronjobss in the provided namespace."""
+@cache
+def get_cronjob_informer() -> Informer:
+    """Return the shared cronjob informer, creating it on first call."""
     api = client.BatchV1Api(get_api_client())
-    if namespace:
-        return await api.list_namespaced_cron_job(namespace)
-    return await api.list_cron_job_for_all_namespaces()
+    return Informer("cronjobs", api.list_cron_job_for_all_namespaces)
+
+
+async def list_cronjobs(namespace: str | None = None) -> V1CronJobList:
+    """Return the cronjobs in the provided namespace (or all namespaces) from the informer cache."""
+    return await get_cronjob_informer().list(namespace)
 
 
 async def get_cronjob(namespace: str, cronjob_name: str) -> V1CronJob:
@@ -1,19 +1,27 @@
 """APIs for interacting with Kubernetes nodes."""
 
+from functools import cache
 from typing import TYPE_CHECKING
 
 from kubernetes_asyncio import client
 
 from arthur.apis.kubernetes import get_api_client
+from arthur.apis.kubernetes.informer import Informer
 
 if TYPE_CHECKING:
     from kubernetes_asyncio.client.models import V1NodeList
 
 
-async def list_nodes() -> V1NodeList:
-    """List Kubernetes nodes."""
+@cache
+def get_node_informer() -> Informer:
+    """Return the shared node informer, creating it on first call."""
     api = client.CoreV1Api(get_api_client())
-    return await api.list_node()
+    return Informer("nodes", api.list_node)
+
+
+async def list_nodes() -> V1NodeList:
+    """List Kubernetes nodes from the informer cache."""
+    return await get_node_informer().list()
 
 
 async def _change_cordon(node: str, *, cordon: bool) -> None:
@@ -1,25 +1,113 @@
 """APIs for working with Kubernetes pods."""
 
+import heapq
+from functools import cache
+from http import HTTPStatus
 from typing import TYPE_CHECKING
 
 from kubernetes_asyncio import client
+from kubernetes_asyncio.client.rest import ApiException
 
 from arthur.apis.kubernetes import get_api_client
+from arthur.apis.kubernetes.informer import Informer
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
     from kubernetes_asyncio.client.models import V1PodList
 
 
-async def list_pods(namespace: str) -> V1PodList:
-    """Query the Kubernetes API for a list of pods in the provided namespace."""
+@cache
+def get_pod_informer() -> Informer:
+    """Return the shared pod informer, creating it on first call."""
     api = client.CoreV1Api(get_api_client())
-    return await api.list_namespaced_pod(namespace=namespace)
+    return Informer("pods", api.list_pod_for_all_namespaces)
+
+
+async def list_pods(namespace: str) -> V1PodList:
+    """Return the pods in the provided namespace from the informer cache."""
+    return await get_pod_informer().list(namespace)
+
+
+def _timestamp_sort_key(line: str) -> tuple[str, str]:
+    # The API server trims trailing zeros from the fractional seconds, so "...:05.1Z" would sort
+    # after "...:05.12Z" as a plain string. Padding the fraction restores the ordering.
+    timestamp, _, _ = line.partition(" ")
+    seconds, _, fraction = timestamp.removesuffix("Z").partition(".")
+    return seconds, fraction.ljust(9, "0")
+
+
+def merge_timestamped_logs(logs: dict[str, list[str]]) -> Iterator[tuple[str, str]]:
+    """
+    Merge log lines fetched with `timestamps=True` into one stream ordered by time.
 
+    `logs` maps pod names to their log lines. Yields `(pod name, line)` pairs with the timestamp
+    prefix removed from each line.
+    """
 
-async def tail_pod(namespace: str, pod_name: str, lines: int = 10) -> str:
-    """Tail the logs of a pod in the provided namespace."""
+    def keyed_lines(pod_name: str, lines: list[str]) -> Iterator[tuple[tuple[str, str], str, str]]:
+        for line in lines:
+            yield _timestamp_sort_key(line), pod_name, line
+
+    streams = [keyed_lines(pod_name, lines) for pod_name, lines in logs.items()]
+    for _, pod_name, line in heapq.merge(*streams):
+        yield pod_name, line.partition(" ")[2]
+
+
+async def stream_pod_logs(
+    namespace: str,
+    pod_name: str,
+    lines: int | None = 10,
+    *,
+    follow: bool = False,
+    timestamps: bool = False,
+    since_seconds: int | None = None,
+    limit_bytes: int | None = None,
+    previous: bool = False,
+    container: str | None = None,
+) -> AsyncIterator[str]:
+    """
+    Yield the log lines of a pod as the API server sends them.
+
+    `lines`, `since_seconds` and `limit_bytes` are applied by the API server, and any left as
+    None are not limited. With `follow` set the stream stays open until the container exits or
+    the iterator is closed. With `timestamps` set, each line is prefixed with its RFC 3339
+    timestamp and a space. `previous` reads the logs of the previous, terminated container
+    instance, and `container` picks the container in multi-container pods.
+    """
     api = client.CoreV1Api(get_api_client())
-    return await api.read_namespaced_pod_log(namespace=namespace, name=pod_name, tail_lines=lines)
+    response = await api.read_namespaced_pod_log(
+        namespace=namespace,
+        name=pod_name,
+        tail_lines=lines,
+        follow=follow,
+        timestamps=timestamps,
+        since_seconds=since_seconds,
+        limit_bytes=limit_bytes,
+        previous=previous,
+        container=container,
+        _preload_content=False,
+    )
+
+    # Without preloading, the client leaves error statuses for the caller to check.
+    if response.status >= HTTPStatus.BAD_REQUEST:
+        error = ApiException(status=response.status, reason=response.reason)
+        error.body = await response.text()
+        response.release()
+        raise error
+
+    try:
+        # Read raw chunks rather than using readline, which gives up on lines over 64KiB.
+        pending = b""
+        async for chunk in response.content.iter_any():
+            *complete, pending = (pending + chunk).split(b"\n")
+            for line in complete:
+                yield line.decode(errors="replace")
+
+        if pending:
+            yield pending.decode(errors="replace")
+    finally:
+        response.release()
 
 
 async def get_pod_names_from_deployment(namespace: str, deployment_name: str) -> list[str]:
@@ -21,8 +21,11 @@ class Config(
     youtube_api_key: pydantic.SecretStr | None = None
     grafana_url: str = "https://grafana.pydis.wtf"
     grafana_token: pydantic.SecretStr | None = None
+    grafana_mutation_concurrency: int = 5
     github_token: pydantic.SecretStr | None = None
     github_org: str = "python-discord"
+    github_use_graphql: bool = False
+    github_mutation_concurrency: int = 5
 
     devops_role: int = 409416496733880320
     helpers_role: int = 267630620367257601
@@ -34,6 +37,8 @@ class Config(
     ldap_bootstrap_channel_id: int = 1266358923875586160
     sentry_dsn: str = ""
     numbers_url: str = "https://pydis.wtf/numbers"
+    # Where caches that should survive restarts are kept. Held in memory only when unset.
+    state_directory: pydantic.DirectoryPath | None = None
 
     # RCE as a service
     ssh_username: str = "kingarthur"  # the terrible
@@ -44,6 +49,7 @@ class Config(
     # FreeIPA accesses are generated off this information
 
     enable_ldap: bool = False
+    ldap_sync_concurrency: int = 5
 
     ldap_host: pydantic.AnyUrl | None = None
     ldap_bind_user: str = (
@@ -0,0 +1,140 @@
+"""A record of the messages King Arthur has sent in the LDAP bootstrap channel."""
+
+import asyncio
+import sqlite3
+from contextlib import closing
+from typing import TYPE_CHECKING
+
+from arthur.config import CONFIG
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+DATABASE_FILENAME = "ldap_bootstrap.sqlite3"
+
+
+class BootstrapLedger:
+    """
+    The bootstrap channel's instructions message, and the enrolment notice sent to each user.
+
+    The ledger is kept in memory and, if `CONFIG.state_directory` is set, written through to an
+    SQLite database there. Without a persisted copy it has to be rebuilt from the channel history
+    once on startup, after which it is kept up to date as messages are sent and deleted.
+
+    Deleting a notice only clears its message ID, so the ledger still remembers that the user was
+    notified and they are not notified again.
+    """
+
+    def __init__(self) -> None:
+        self.instructions_message_id: int | None = None
+        # Maps Discord user ID to the ID of the enrolment notice mentioning them, or None once the
+        # notice has been deleted.
+        self._notices: dict[int, int | None] = {}
+        self._path: Path | None = (
+            CONFIG.state_directory / DATABASE_FILENAME if CONFIG.state_directory else None
+        )
+
+    def __contains__(self, user_id: int) -> bool:
+        """Whether the user has been notified, even if the notice has since been deleted."""
+        return user_id in self._notices
+
+    @property
+    def notices(self) -> dict[int, int]:
+        """The enrolment notices still in the channel, keyed by Discord user ID."""
+        return {
+            user_id: message_id
+            for user_id, message_id in self._notices.items()
+            if message_id is not None
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS notices (user_id INTEGER PRIMARY KEY, message_id INTEGER)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS instructions (id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "message_id INTEGER NOT NULL)"
+        )
+        return connection
+
+    def _read(self) -> tuple[int | None, list[tuple[int, int | None]]]:
+        with closing(self._connect()) as connection:
+            instructions = connection.execute("SELECT message_id FROM instructions").fetchone()
+            notices = connection.execute("SELECT user_id, message_id FROM notices").fetchall()
+        return (instructions[0] if instructions else None), notices
+
+    def _execute(self, *statements: tuple[str, tuple]) -> None:
+        with closing(self._connect()) as connection, connection:
+            for statement, parameters in statements:
+                connection.execute(statement, parameters)
+
+    async def _persist(self, *statements: tuple[str, tuple]) -> None:
+        if self._path is None:
+            return
+
+        try:
+            await asyncio.to_thread(self._execute, *statements)
+        except sqlite3.Error as e:
+            logger.opt(exception=e).warning("LDAP: Could not persist the bootstrap ledger.")
+
+    async def load(self) -> bool:
+        """Load the persisted ledger, returning whether there was one to load."""
+        if self._path is None:
+            return False
+
+        try:
+            instructions_message_id, notices = await asyncio.to_thread(self._read)
+        except sqlite3.Error as e:
+            logger.opt(exception=e).warning("LDAP: Could not load the bootstrap ledger.")
+            return False
+
+        if instructions_message_id is None:
+            return False
+
+        self.instructions_message_id = instructions_message_id
+        self._notices = dict(notices)
+        logger.info(f"LDAP: Loaded {len(notices)} notified users from the bootstrap ledger.")
+        return True
+
+    async def rebuild(self, instructions_message_id: int | None, notices: dict[int, int]) -> None:
+        """Replace the ledger with the contents of the channel, as found by a history scan."""
+        self._notices = dict(notices)
+        self.instructions_message_id = instructions_message_id
+
+        statements = [("DELETE FROM notices", ()), ("DELETE FROM instructions", ())]
+        statements += [("INSERT INTO notices VALUES (?, ?)", notice) for notice in notices.items()]
+        if instructions_message_id is not None:
+            statements.append(
+                ("INSERT INTO instructions VALUES (0, ?)", (instructions_message_id,))
+            )
+        await self._persist(*statements)
+
+    async def set_instructions(self, message_id: int) -> None:
+        """Record the channel's instructions message."""
+        self.instructions_message_id = message_id
+        await self._persist(
+            ("INSERT OR REPLACE INTO instructions VALUES (0, ?)", (message_id,)),
+        )
+
+    async def record(self, user_id: int, message_id: int) -> None:
+        """Record the enrolment notice sent to a user."""
+        self._notices[user_id] = message_id
+        await self._persist(
+            ("INSERT OR REPLACE INTO notices VALUES (?, ?)", (user_id, message_id)),
+        )
+
+    async def clear_notice(self, user_id: int) -> int | None:
+        """
+        Mark a user's notice as deleted, returning its message ID if there was one.
+
+        The user stays recorded as notified.
+        """
+        message_id = self._notices.get(user_id)
+        if message_id is not None:
+            self._notices[user_id] = None
+            await self._persist(
+                ("UPDATE notices SET message_id = NULL WHERE user_id = ?", (user_id,))
+            )
+        return message_id
@@ -1,7 +1,10 @@
 """The LDAP cog is used to interact with our directory services, FreeIPA & Keycloak."""
 
+import asyncio
+import functools
 import secrets
-from collections import Counter
+import time
+from collections import Counter, defaultdict
 from dataclasses import dataclass
 from enum import StrEnum
 from typing import TYPE_CHECKING
@@ -13,10 +16,11 @@ from discord.ext import commands, tasks
 from arthur.apis.directory import freeipa, keycloak, ldap
 from arthur.config import CONFIG
 from arthur.constants import HELPER_ROLE_ID, LDAP_ROLE_MAPPING
+from arthur.exts.directory._bootstrap_ledger import BootstrapLedger
 from arthur.log import logger
 
 if TYPE_CHECKING:
-    from datetime import datetime
+    from collections.abc import Awaitable, Callable, Iterable
 
     from arthur.bot import KingArthurTheTerrible
 
@@ -26,6 +30,11 @@ MAX_MESSAGE_LENGTH = 2000
 
 NOTIFICATIONS_ENABLED = True
 
+# How long to wait for further member updates before reconciling the members that changed.
+MEMBER_SYNC_DEBOUNCE_SECONDS = 5
+# Cached member states are thrown away this often, in case a member update event was missed.
+MEMBER_STATE_MAX_AGE_SECONDS = 60 * 60
+
 BOOTSTRAP_CHANNEL_TOPIC = """
 This channel is used for Python Discord LDAP enrollment. If you have been added to the LDAP directory, you will receive a message here with instructions on how to create your login credentials.
 
@@ -109,6 +118,24 @@ class DiffedUser:
     action: LDAPSyncAction
 
 
+@dataclass(frozen=True)
+class SyncActionOutcome:
+    """The result of applying a single sync action, with how long it took."""
+
+    action: LDAPSyncAction
+    target: str
+    duration: float
+    error: Exception | None = None
+
+
+@dataclass(frozen=True)
+class MemberState:
+    """The parts of a guild member that the diff depends on, cached between syncs."""
+
+    role_ids: frozenset[int]
+    groups: tuple[str, ...]
+
+
 class BootstrapType(StrEnum):
     """Represents the type of bootstrap operation."""
 
@@ -157,80 +184,173 @@ class LDAP(commands.Cog):
 
     def __init__(self, bot: KingArthurTheTerrible) -> None:
         self.bot = bot
-        self._notified_user_ids: set[int] = set()
-        self._last_history_scan: datetime | None = None
+        self._ledger = BootstrapLedger()
+        # Set once cog_load has loaded or rebuilt the ledger, so syncs don't re-notify users.
+        self._ledger_ready = asyncio.Event()
+        # Only one sync, full or incremental, runs at a time.
+        self._sync_lock = asyncio.Lock()
+        self._pending_member_ids: set[int] = set()
+        # Set by every queued member update, to restart the wait for updates to settle.
+        self._member_updated = asyncio.Event()
+        self._member_sync_task: asyncio.Task | None = None
+        # Cached per-member diff inputs, recomputed only for members marked dirty by events.
+        self._member_states: dict[int, MemberState] = {}
+        self._dirty_member_ids: set[int] = set()
+        self._member_states_built_at = time.monotonic()
         self.sync_users.start()
 
     async def cog_unload(self) -> None:
         """Cancel background tasks on unload."""
         self.sync_users.cancel()
+        if self._member_sync_task is not None:
+            self._member_sync_task.cancel()
 
     @tasks.loop(minutes=10)
     async def sync_users(self) -> None:
         """Sync users with the LDAP directory."""
-        try:
-            logger.info("Syncing users with the LDAP directory.")
-
-            diff, missing_emp, counts, ldap_users = await self.get_user_diff()
+        async with self._sync_lock:
+            try:
+                logger.info("Syncing users with the LDAP directory.")
 
-            add_users = counts[LDAPSyncAction.ADD]
-            remove_users = counts[LDAPSyncAction.REMOVE]
-            keep_users = counts[LDAPSyncAction.KEEP]
-            change_users = counts[LDAPSyncAction.CHANGE]
-            no_action_users = counts[LDAPSyncAction.NO_ACTION]
+                diff, missing_emp, counts, ldap_users = await self.get_user_diff()
 
-            logger.info(
-                f"LDAP: {add_users} missing users, removing {remove_users} users, "
-                f"keeping {keep_users} users, changing {change_users} users and no action for {no_action_users} users."
-            )
+                add_users = counts[LDAPSyncAction.ADD]
+                remove_users = counts[LDAPSyncAction.REMOVE]
+                keep_users = counts[LDAPSyncAction.KEEP]
+                change_users = counts[LDAPSyncAction.CHANGE]
+                no_action_users = counts[LDAPSyncAction.NO_ACTION]
 
-            if len(missing_emp) > 0:
-                logger.error(
-                    "LDAP: Some users are missing an employee number. This may lead to duplicated users being created."
+                logger.info(
+                    f"LDAP: {add_users} missing users, removing {remove_users} users, "
+                    f"keeping {keep_users} users, changing {change_users} users and no action for {no_action_users} users."
                 )
 
+                if len(missing_emp) > 0:
+                    logger.error(
+                        "LDAP: Some users are missing an employee number. This may lead to duplicated users being created."
+                    )
+
+                    await self.bot.get_channel(CONFIG.devops_channel_id).send(
+                        ":x: LDAP Sync: Some users are missing an employee number. This may lead to duplicate users, please rectify."
+                    )
+
+                handled = {
+                    user.ldap_user.employee_number if user.ldap_user else str(user.discord_user.id)
+                    for user in diff
+                }
+                await self._apply_diff(diff, self._left_users(handled, ldap_users))
+
+                logger.info("LDAP: Sync complete.")
+            except Exception as e:  # noqa: BLE001
+                logger.exception(f"LDAP: Error during sync: {e}", exc_info=True)
                 await self.bot.get_channel(CONFIG.devops_channel_id).send(
-                    ":x: LDAP Sync: Some users are missing an employee number. This may lead to duplicate users, please rectify."
+                    f":x: LDAP Sync Error: ```python\n{e}```"
                 )
 
-            now = discord.utils.utcnow()
-            channel = self.bot.get_channel(CONFIG.ldap_bootstrap_channel_id)
-            history = (
-                channel.history(after=self._last_history_scan, oldest_first=True)
-                if self._last_history_scan is not None
-                else channel.history(limit=None, oldest_first=True)
+    def _schedule_member_sync(self, member_id: int) -> None:
+        """Queue a member to be reconciled, coalescing with any other pending updates."""
+        self._pending_member_ids.add(member_id)
+        self._member_updated.set()
+        if self._member_sync_task is None:
+            self._member_sync_task = asyncio.create_task(
+                self._run_member_syncs(), name="ldap-member-sync"
             )
-            async for message in history:
-                if (
-                    "Python Discord LDAP enrollment" in message.content
-                    or len(message.mentions) == 0
-                    or message.author != self.bot.user
-                ):
-                    continue
 
-                self._notified_user_ids.add(message.mentions[0].id)
+    async def _run_member_syncs(self) -> None:
+        """
+        Reconcile pending members once no updates have arrived for `MEMBER_SYNC_DEBOUNCE_SECONDS`.
 
-            self._last_history_scan = now
+        Updates that arrive whilst a sync is running are picked up by a follow-up sync, rather than
+        starting one of their own.
+        """
+        await self._ledger_ready.wait()
+        while True:
+            await self._wait_for_quiet()
 
-            handled = set()
+            member_ids = self._pending_member_ids
+            self._pending_member_ids = set()
+            await self.sync_members(member_ids)
 
-            for user in diff:
-                await self._process_user(user, self._notified_user_ids)
-                handled.add(
-                    user.ldap_user.employee_number if user.ldap_user else str(user.discord_user.id)
-                )
+            if not self._pending_member_ids:
+                self._member_sync_task = None
+                return
 
-            await self._handle_left_users(handled, ldap_users)
+    async def _wait_for_quiet(self) -> None:
+        """Wait until no member updates have been queued for `MEMBER_SYNC_DEBOUNCE_SECONDS`."""
+        while True:
+            self._member_updated.clear()
+            try:
+                await asyncio.wait_for(self._member_updated.wait(), MEMBER_SYNC_DEBOUNCE_SECONDS)
+            except TimeoutError:
+                return
 
-            logger.info("LDAP: Sync complete.")
-        except Exception as e:  # noqa: BLE001
-            logger.exception(f"LDAP: Error during sync: {e}", exc_info=True)
-            await self.bot.get_channel(CONFIG.devops_channel_id).send(
-                f":x: LDAP Sync Error: ```python\n{e}```"
-            )
+    async def sync_members(self, member_ids: Iterable[int]) -> None:
+        """Reconcile only the given guild members with the LDAP directory."""
+        async with self._sync_lock:
+            try:
+                guild = self.bot.get_guild(CONFIG.guild_id)
+                members = [
+                    member for member_id in member_ids if (member := guild.get_member(member_id))
+                ]
+                logger.info(f"LDAP: Reconciling {len(members)} updated members.")
+
+                user_index = ldap.get_user_index()
+                if user_index.is_stale:
+                    await user_index.refresh()
+
+                diff = await self._diff_members(members, user_index.users)
+                # Members who have left the guild are handled by the next full sync.
+                await self._apply_diff(diff, [])
+            except Exception as e:  # noqa: BLE001
+                logger.exception(f"LDAP: Error during member sync: {e}", exc_info=True)
+                await self.bot.get_channel(CONFIG.devops_channel_id).send(
+                    f":x: LDAP Member Sync Error: ```python\n{e}```"
+                )
 
-    async def _handle_left_users(self, handled: list[int], ldap_users: list[ldap.LDAPUser]) -> None:
-        """Handle users that have left the guild and so were not processed."""
+    @sync_users.before_loop
+    async def _wait_for_ledger(self) -> None:
+        await self._ledger_ready.wait()
+
+    async def _apply_diff(self, diff: list[DiffedUser], left_users: list[ldap.LDAPUser]) -> None:
+        """Apply the actions in a diff, deactivating any users that have left the guild."""
+        # Group changes are applied separately below, as a single batch, and users needing no
+        # action are left out so they don't count towards the applied actions and timings.
+        actions = [
+            (
+                user.action,
+                user.discord_user.name,
+                functools.partial(self._process_user, user),
+            )
+            for user in diff
+            if user.action not in {LDAPSyncAction.CHANGE, LDAPSyncAction.NO_ACTION}
+        ]
+        actions += [
+            (
+                LDAPSyncAction.REMOVE,
+                user.uid,
+                functools.partial(freeipa.deactivate_user, user.uid),
+            )
+            for user in left_users
+        ]
+        await self._apply_actions(actions)
+
+        # Group changes for every user are sent to FreeIPA together as a single batch.
+        group_changes = [
+            operation
+            for user in diff
+            if user.action == LDAPSyncAction.CHANGE
+            for operation in freeipa.group_operations(
+                user.ldap_user.uid, user.groups, user.ldap_user.groups
+            )
+        ]
+        results = await self._apply_group_changes(group_changes)
+        self._record_group_changes(diff, results)
+
+    def _left_users(
+        self, handled: set[str], ldap_users: list[ldap.LDAPUser]
+    ) -> list[ldap.LDAPUser]:
+        """Return users that have left the guild, were not processed, and need deactivating."""
+        left_users = []
         for user in ldap_users:
             if user.employee_number is None or user.employee_number in handled:
                 continue
@@ -240,34 +360,151 @@ class LDAP(commands.Cog):
                 continue
 
             logger.info(f"LDAP: Deactivating user {user.uid} as they are no longer in the guild.")
-            freeipa.deactivate_user(user.uid)
+            left_users.append(user)
+
+        return left_users
+
+    async def _apply_action(
+        self,
+        semaphore: asyncio.Semaphore,
+        action: LDAPSyncAction,
+        target: str,
+        apply: Callable[[], Awaitable[None]],
+    ) -> SyncActionOutcome:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await apply()
+            except Exception as e:  # noqa: BLE001
+                return SyncActionOutcome(action, target, time.perf_counter() - start, e)
+
+            return SyncActionOutcome(action, target, time.perf_counter() - start)
+
+    async def _apply_actions(
+        self, actions: list[tuple[LDAPSyncAction, str, Callable[[], Awaitable[None]]]]
+    ) -> None:
+        """
+        Apply sync actions concurrently, then log their timings and report all failures at once.
+
+        At most `CONFIG.ldap_sync_concurrency` actions run at a time.
+        """
+        semaphore = asyncio.Semaphore(CONFIG.ldap_sync_concurrency)
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(self._apply_action(semaphore, *action) for action in actions)
+        )
+        elapsed = time.perf_counter() - start
+
+        durations: defaultdict[LDAPSyncAction, list[float]] = defaultdict(list)
+        for outcome in outcomes:
+            durations[outcome.action].append(outcome.duration)
+
+        logger.info(f"LDAP: Applied {len(outcomes)} actions in {elapsed:.2f}s.")
+        for action, times in sorted(durations.items()):
+            logger.debug(
+                f"LDAP: {len(times)} {action} actions took {sum(times):.2f}s in total, "
+                f"slowest {max(times):.2f}s."
+            )
+
+        failed = [outcome for outcome in outcomes if outcome.error]
+        for outcome in failed:
+            logger.opt(exception=outcome.error).error(
+                f"LDAP: Failed to apply {outcome.action} for {outcome.target}."
+            )
+
+        await self._report_failures(
+            f"{len(failed)} of {len(outcomes)} actions failed",
+            [f"- {outcome.action} `{outcome.target}`: {outcome.error}" for outcome in failed],
+        )
+
+    async def _report_failures(self, summary: str, lines: list[str]) -> None:
+        """Send failures from a sync to the devops channel, if there were any."""
+        if not lines:
+            return
+
+        message = f":x: LDAP Sync: {summary}:\n" + "\n".join(lines)
+        if len(message) > MAX_MESSAGE_LENGTH:
+            message = message[: MAX_MESSAGE_LENGTH - 3] + "..."
+        await self.bot.get_channel(CONFIG.devops_channel_id).send(message)
+
+    async def _apply_group_changes(
+        self, operations: list[freeipa.Operation]
+    ) -> list[freeipa.OperationResult]:
+        """Apply group membership changes in one FreeIPA batch and report any that failed."""
+        if not operations:
+            return []
+
+        results = await freeipa.batch(operations)
+        failed = [result for result in results if result.error]
+
+        logger.info(f"LDAP: Applied {len(results) - len(failed)} of {len(results)} group changes.")
+        for result in failed:
+            logger.error(f"LDAP: Group change `{result.operation}` failed: {result.error}")
 
-    async def _process_user(self, user: DiffedUser, notified_user_ids: set[int]) -> None:
+        await self._report_failures(
+            f"{len(failed)} of {len(results)} group changes failed",
+            [f"- `{result.operation}`: {result.error}" for result in failed],
+        )
+        return results
+
+    @staticmethod
+    def _record_group_changes(
+        diff: list[DiffedUser], results: list[freeipa.OperationResult]
+    ) -> None:
+        """
+        Apply successful group changes to the diffed LDAP users.
+
+        The diffed users are the user index's own objects, so this keeps incremental syncs between
+        full syncs from diffing against groups that have since been changed.
+        """
+        users_by_uid = {
+            user.ldap_user.uid: user.ldap_user
+            for user in diff
+            if user.action == LDAPSyncAction.CHANGE
+        }
+        for result in results:
+            if result.error:
+                continue
+
+            (group,) = result.operation.args
+            ldap_user = users_by_uid[result.operation.options["user"][0]]
+            groups = [g for g in ldap_user.groups or [] if g != group]
+            if result.operation.method == "group_add_member":
+                groups.append(group)
+            ldap_user.groups = groups
+
+    async def _process_user(self, user: DiffedUser) -> None:
         if user.action == LDAPSyncAction.ADD:
-            if user.discord_user.id in notified_user_ids:
+            if user.discord_user.id in self._ledger:
                 return
 
             if NOTIFICATIONS_ENABLED:
-                await self.bot.get_channel(CONFIG.ldap_bootstrap_channel_id).send(
+                message = await self.bot.get_channel(CONFIG.ldap_bootstrap_channel_id).send(
                     ELIGIBLE_MESSAGE.format(mention=user.discord_user.mention)
                 )
+                await self._ledger.record(user.discord_user.id, message.id)
         if user.action == LDAPSyncAction.KEEP:
             if user.ldap_user and user.ldap_user.locked:
-                freeipa.activate_user(user.ldap_user.uid)
+                await freeipa.activate_user(user.ldap_user.uid)
         if user.action == LDAPSyncAction.REMOVE:
             if user.ldap_user and not user.ldap_user.locked:
-                freeipa.deactivate_user(user.ldap_user.uid)
-        elif user.action == LDAPSyncAction.CHANGE:
-            freeipa.set_user_groups(user.ldap_user.uid, user.groups)
+                await freeipa.deactivate_user(user.ldap_user.uid)
 
     async def cleanup_bootstrap(self, user: discord.Member) -> None:
         """Clear up the bootstrap message for a user."""
-        channel = self.bot.get_channel(CONFIG.ldap_bootstrap_channel_id)
+        await self._delete_notice(user.id)
 
-        async for message in channel.history(limit=None, oldest_first=True):
-            if message.author == self.bot.user and user.mention in message.content:
-                await message.delete()
-                break
+    async def _delete_notice(self, user_id: int) -> None:
+        """Delete the enrolment notice sent to a user, if there is one."""
+        message_id = await self._ledger.clear_notice(user_id)
+        if message_id is None:
+            return
+
+        channel = self.bot.get_channel(CONFIG.ldap_bootstrap_channel_id)
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            logger.debug(f"LDAP: Bootstrap message for {user_id} was already deleted.")
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
@@ -275,32 +512,67 @@ class LDAP(commands.Cog):
         if before.roles == after.roles:
             return
 
+        self._dirty_member_ids.add(after.id)
+
         before_roles = {role.id for role in before.roles}
         after_roles = {role.id for role in after.roles}
 
         if HELPER_ROLE_ID in before_roles or HELPER_ROLE_ID in after_roles:
-            await self.sync_users()
+            self._schedule_member_sync(after.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        """Forget the cached state of members that leave."""
+        self._member_states.pop(member.id, None)
+        self._dirty_member_ids.discard(member.id)
 
     async def bootstrap(self, user: discord.Member) -> tuple[BootstrapType, str, str | None]:
         """Bootstrap a user into the LDAP directory, either creating or resetting the password."""
-        if ldap_user := await ldap.find_by_discord_id(user.id):
+        user_index = ldap.get_user_index()
+        if ldap_user := await user_index.get(user.id, confirm_missing=True):
             password = secrets.token_urlsafe(20)
 
             await keycloak.force_password_reset(ldap_user.uid, password)
 
             return BootstrapType.RESET, password, ldap_user.uid
 
-        generated_pw = freeipa.create_user(
+        groups = await self._user_groups(user)
+        generated_pw = await freeipa.create_user(
             user.name,
             user.display_name,
-            await self._user_groups(user),
+            groups,
             user.id,
         )
+        user_index.add(
+            ldap.LDAPUser(
+                uid=user.name,
+                employee_number=str(user.id),
+                display_name=user.display_name,
+                groups=groups,
+            )
+        )
 
         await self.cleanup_bootstrap(user)
 
         return BootstrapType.CREATION, generated_pw, None
 
+    async def _rebuild_ledger(self, channel: discord.TextChannel) -> None:
+        """Rebuild the bootstrap ledger from the channel's history."""
+        logger.info("LDAP: Rebuilding the bootstrap ledger from channel history.")
+        instructions_message_id = None
+        notices = {}
+
+        async for message in channel.history(limit=None, oldest_first=True):
+            if message.author != self.bot.user:
+                continue
+
+            if "Python Discord LDAP" in message.content:
+                instructions_message_id = message.id
+            elif message.mentions:
+                notices[message.mentions[0].id] = message.id
+
+        await self._ledger.rebuild(instructions_message_id, notices)
+
     async def cog_load(self) -> None:  # noqa: C901, PLR0912
         """Verify the bootstrap channel is setup as intended."""
         self.bot.add_view(BootstrapView(self))
@@ -312,27 +584,38 @@ class LDAP(commands.Cog):
 
         if not channel:
             logger.error("LDAP: Bootstrap channel not found.")
+            self._ledger_ready.set()
             return
 
+        try:
+            if not await self._ledger.load():
+                await self._rebuild_ledger(channel)
+        except Exception as e:
+            # Syncing with an empty ledger would notify every eligible user again.
+            logger.opt(exception=e).error("LDAP: Could not load the bootstrap ledger.")
+            self.sync_users.cancel()
+            raise
+        self._ledger_ready.set()
+
         await channel.edit(
             topic=BOOTSTRAP_CHANNEL_TOPIC.format(devops_channel_id=CONFIG.devops_channel_id)
         )
 
-        found_message = None
-        other_messages = []
-
-        async for message in channel.history(limit=None, oldest_first=True):
-            if message.author == self.bot.user and "Python Discord LDAP" in message.content:
-                found_message = message
-
-            if message.author == self.bot.user and len(message.mentions) > 0:
-                target_user = message.mentions[0]
+        user_index = ldap.get_user_index()
+        if user_index.is_stale:
+            await user_index.refresh()
 
-                if await ldap.find_by_discord_id(target_user.id):
-                    other_messages.append(message)
+        # Users who have since been enrolled no longer need their notice.
+        for user_id in self._ledger.notices:
+            if await user_index.get(user_id):
+                await self._delete_notice(user_id)
 
-        for message in other_messages:
-            await message.delete()
+        found_message = None
+        if self._ledger.instructions_message_id is not None:
+            try:
+                found_message = await channel.fetch_message(self._ledger.instructions_message_id)
+            except discord.NotFound:
+                logger.warning("LDAP: Recorded bootstrap message no longer exists.")
 
         if found_message:
             logger.info("LDAP: Found bootstrap message.")
@@ -340,7 +623,8 @@ class LDAP(commands.Cog):
                 await found_message.edit(content=bootstrap_message, view=BootstrapView(self))
         else:
             logger.info("LDAP: Creating bootstrap message.")
-            await channel.send(bootstrap_message, view=BootstrapView(self))
+            message = await channel.send(bootstrap_message, view=BootstrapView(self))
+            await self._ledger.set_instructions(message.id)
 
         # Validate all enrolled roles can see the channel
         for mapping in LDAP_ROLE_MAPPING.values():
@@ -369,11 +653,16 @@ class LDAP(commands.Cog):
         """Commands for working with the Python Discord directory."""
         await ctx.send_help(ctx.command)
 
-    async def _user_groups(self, user: discord.Member) -> list[str]:
+    async def _user_groups(
+        self, user: discord.Member, role_ids: frozenset[int] | None = None
+    ) -> list[str]:
         """Return the groups a user is enrolled in."""
+        if role_ids is None:
+            role_ids = frozenset(r.id for r in user.roles)
+
         groups = []
         for role, mapping in LDAP_ROLE_MAPPING.items():
-            if mapping["discord_role_id"] not in [r.id for r in user.roles]:
+            if mapping["discord_role_id"] not in role_ids:
                 continue
             if role == "devops" and not await self.bot.is_owner(user):
                 continue
@@ -386,20 +675,48 @@ class LDAP(commands.Cog):
         """Calculate and return the diff of users against LDAP from the guild."""
         guild = self.bot.get_guild(CONFIG.guild_id)
         users = await ldap.find_users()
+        ldap.get_user_index().update(users)
+
+        if time.monotonic() - self._member_states_built_at > MEMBER_STATE_MAX_AGE_SECONDS:
+            logger.info("LDAP: Rebuilding cached member states.")
+            self._member_states.clear()
+            self._dirty_member_ids.clear()
+            self._member_states_built_at = time.monotonic()
+
+        diff = await self._diff_members(guild.members, users)
+        missing_emp = [user for user in users if user.employee_number is None]
+        counter = Counter([user.action for user in diff])
+
+        return diff, missing_emp, counter, users
+
+    async def _member_state(self, member: discord.Member) -> MemberState:
+        """Return the cached state of a member, recomputing it if their roles have changed."""
+        state = self._member_states.get(member.id)
+        if state is None or member.id in self._dirty_member_ids:
+            role_ids = frozenset(role.id for role in member.roles)
+            state = MemberState(role_ids, tuple(await self._user_groups(member, role_ids)))
+            self._member_states[member.id] = state
+            self._dirty_member_ids.discard(member.id)
+
+        return state
+
+    async def _diff_members(
+        self, members: Iterable[discord.Member], users: list[ldap.LDAPUser]
+    ) -> list[DiffedUser]:
+        """Calculate the actions needed to bring the given members in line with LDAP."""
         ldap_discord_id_map = {user.employee_number: user for user in users}
 
         enrolled_roles = {mapping["discord_role_id"] for mapping in LDAP_ROLE_MAPPING.values()}
 
-        base_role = guild.get_role(HELPER_ROLE_ID)
-
         diff = []
-        missing_emp = [user for user in users if user.employee_number is None]
 
-        for user in guild.members:
+        for user in members:
             if user.bot:
                 continue
 
-            if base_role not in user.roles:
+            state = await self._member_state(user)
+
+            if HELPER_ROLE_ID not in state.role_ids:
                 if user.id in ldap_discord_id_map:
                     action = (
                         LDAPSyncAction.NO_ACTION
@@ -409,17 +726,16 @@ class LDAP(commands.Cog):
                     diff.append(DiffedUser(user, ldap_discord_id_map[user.id], [], action))
                 continue
 
-            user_role_ids = {r.id for r in user.roles}
-
-            if enrolled_roles & user_role_ids:
-                roles = await self._user_groups(user)
+            if enrolled_roles & state.role_ids:
+                roles = list(state.groups)
                 if user.id in ldap_discord_id_map:
                     diff.append(
                         DiffedUser(user, ldap_discord_id_map[user.id], roles, LDAPSyncAction.KEEP)
                     )
                     if set(roles) != set(ldap_discord_id_map[user.id].groups):
                         diff[-1].action = LDAPSyncAction.CHANGE
-                else:
+                elif user.id not in ldap.get_user_index():
+                    # Members already in the directory must not be offered enrolment again.
                     diff.append(DiffedUser(user, None, roles, LDAPSyncAction.ADD))
             elif user.id in ldap_discord_id_map:
                 action = (
@@ -429,9 +745,7 @@ class LDAP(commands.Cog):
                 )
                 diff.append(DiffedUser(user, ldap_discord_id_map[user.id], [], action))
 
-        counter = Counter([user.action for user in diff])
-
-        return diff, missing_emp, counter, users
+        return diff
 
     @staticmethod
     def _format_user(discord_user: discord.Member, ldap_user: ldap.LDAPUser | None) -> str:
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 
 from discord.ext.commands import Cog, Context, command
 
-from arthur.apis.directory.ldap import find_by_discord_id
+from arthur.apis.directory.ldap import get_user_index
 from arthur.apis.email import send_email
 from arthur.apis.netcup.ssh import rce_as_a_service
 
@@ -67,7 +67,7 @@ class RemoteCommands(Cog):
             await ctx.send(discord_message)
             return
 
-        ldap_user = await find_by_discord_id(ctx.author.id)
+        ldap_user = await get_user_index().get(ctx.author.id)
         if not ldap_user:
             await ctx.send(
                 ":x: Output is too long for Discord and no LDAP user was found for your Discord ID."
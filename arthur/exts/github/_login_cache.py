@@ -0,0 +1,106 @@
+"""A persistent cache of GitHub account ID to login resolutions."""
+
+import asyncio
+import sqlite3
+import time
+from contextlib import closing
+from typing import TYPE_CHECKING
+
+from arthur.config import CONFIG
+from arthur.log import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+DATABASE_FILENAME = "github_logins.sqlite3"
+# Logins can be renamed, so even successful resolutions are eventually re-checked.
+RESOLVED_TTL_SECONDS = 24 * 60 * 60
+# Account IDs that 404'd (usually deleted accounts) are retried sooner in case of a blip.
+UNRESOLVED_TTL_SECONDS = 60 * 60
+
+
+class LoginCache:
+    """
+    GitHub account ID to login resolutions, with expiry and negative caching.
+
+    Entries are always held in memory. If `CONFIG.state_directory` is set they are also written
+    to an SQLite database there, so a restart doesn't have to resolve every account again.
+    """
+
+    def __init__(self) -> None:
+        # Maps account ID to (login, resolved at). A login of None means the ID did not resolve.
+        self._entries: dict[str, tuple[str | None, float]] = {}
+        self._path: Path | None = (
+            CONFIG.state_directory / DATABASE_FILENAME if CONFIG.state_directory else None
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS logins "
+            "(user_id TEXT PRIMARY KEY, login TEXT, resolved_at REAL NOT NULL)"
+        )
+        return connection
+
+    def _read(self) -> list[tuple[str, str | None, float]]:
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT user_id, login, resolved_at FROM logins").fetchall()
+
+    def _write(self, rows: list[tuple[str, str | None, float]]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO logins VALUES (?, ?, ?)", rows)
+
+    async def load(self) -> None:
+        """Load previously persisted resolutions, if a state directory is configured."""
+        if self._path is None:
+            return
+
+        try:
+            rows = await asyncio.to_thread(self._read)
+        except sqlite3.Error as e:
+            logger.opt(exception=e).warning("GitHub: Could not load the login cache.")
+            return
+
+        self._entries.update(
+            {user_id: (login, resolved_at) for user_id, login, resolved_at in rows}
+        )
+        logger.info(f"GitHub: Loaded {len(rows)} cached login resolutions.")
+
+    def _is_fresh(self, user_id: str) -> bool:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return False
+
+        login, resolved_at = entry
+        ttl = RESOLVED_TTL_SECONDS if login is not None else UNRESOLVED_TTL_SECONDS
+        return time.time() - resolved_at < ttl
+
+    def get(self, user_id: str) -> str | None:
+        """Return the cached login for `user_id`, or None if it is unknown, unresolvable or expired."""
+        if not self._is_fresh(user_id):
+            return None
+        return self._entries[user_id][0]
+
+    def misses(self, user_ids: Iterable[str]) -> set[str]:
+        """Return the IDs that have no fresh entry, positive or negative."""
+        return {user_id for user_id in user_ids if not self._is_fresh(user_id)}
+
+    async def store(self, resolutions: dict[str, str | None]) -> None:
+        """Record resolutions, where a login of None marks the ID as unresolvable."""
+        if not resolutions:
+            return
+
+        now = time.time()
+        rows = [(user_id, login, now) for user_id, login in resolutions.items()]
+        self._entries.update(
+            {user_id: (login, resolved_at) for user_id, login, resolved_at in rows}
+        )
+
+        if self._path is None:
+            return
+
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except sqlite3.Error as e:
+            logger.opt(exception=e).warning("GitHub: Could not persist the login cache.")
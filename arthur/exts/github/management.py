@@ -1,5 +1,6 @@
 """Commands for managing the GitHub organisation and teams."""
 
+import asyncio
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
@@ -9,15 +10,17 @@ from discord.ext.commands import Cog, group
 
 from arthur.apis.directory import ldap
 from arthur.apis.directory.keycloak import (
-    all_github_identities,
+    GitHubIdentityCache,
     get_discord_id,
     get_user_id,
     remove_federated_identity_provider_link,
 )
 from arthur.apis.github import (
     GitHubError,
+    MembershipSnapshot,
     add_member_to_team,
     add_org_member,
+    fetch_membership_snapshot,
     get_username_for_user_id,
     list_failed_org_invitations,
     list_organisation_member_identities,
@@ -26,9 +29,12 @@ from arthur.apis.github import (
     remove_failed_org_invitation,
     remove_member_from_team,
     remove_org_member,
+    resolve_logins_by_user_id,
+    response_cache,
 )
 from arthur.config import CONFIG
 from arthur.constants import LDAP_ROLE_MAPPING
+from arthur.exts.github._login_cache import LoginCache
 from arthur.log import logger
 
 if TYPE_CHECKING:
@@ -46,6 +52,8 @@ class SyncCommonInfo:
     resolved_logins_by_user_id: dict[str, str]
     pending_invitations: set[str]
     failed_invitations: set[str]
+    # Only present when membership was fetched over GraphQL.
+    team_members_by_slug: dict[str, list[str]] | None = None
 
 
 @dataclass(frozen=True)
@@ -83,10 +91,12 @@ class GitHubManagement(Cog):
     GITHUB_RECONNECT_LINK = (
         "https://id.pydis.wtf/realms/pydis/account/account-security/linked-accounts"
     )
+    MAX_LOGIN_RESOLUTION_CONCURRENCY = 10
 
     def __init__(self, bot: KingArthurTheTerrible) -> None:
         self.bot = bot
-        self._resolved_logins_cache: dict[str, str] = {}
+        self._login_cache = LoginCache()
+        self._identity_cache = GitHubIdentityCache()
 
     @staticmethod
     def _normalise_login(username: str) -> str:
@@ -121,6 +131,7 @@ class GitHubManagement(Cog):
                 )
                 return
 
+            response_cache.reset_counters()
             common_info = await self._fetch_common_info()
             org_added, org_removed = await self._sync_github_members(report_thread, common_info)
             team_added, team_removed = await self._sync_github_teams(report_thread, common_info)
@@ -129,7 +140,8 @@ class GitHubManagement(Cog):
                 logger.info(
                     "GitHub: Sync complete. "
                     f"Org added={len(org_added)}, org removed={len(org_removed)}, "
-                    f"team added={len(team_added)}, team removed={len(team_removed)}."
+                    f"team added={len(team_added)}, team removed={len(team_removed)}, "
+                    f"cache hits={response_cache.hits}, cache misses={response_cache.misses}."
                 )
                 await self._report_sync_result(
                     report_thread,
@@ -139,7 +151,10 @@ class GitHubManagement(Cog):
                     team_removed,
                 )
             else:
-                logger.info("GitHub: Sync complete. No changes needed.")
+                logger.info(
+                    "GitHub: Sync complete. No changes needed. "
+                    f"Cache hits={response_cache.hits}, cache misses={response_cache.misses}."
+                )
         except Exception as e:  # noqa: BLE001
             logger.exception(f"GitHub: Error during sync: {e}", exc_info=True)
             report_thread = await self._get_debug_thread()
@@ -169,7 +184,9 @@ class GitHubManagement(Cog):
             f":office: Org added: {org_added_text}\n"
             f":office: Org removed: {org_removed_text}\n"
             f":busts_in_silhouette: Team added: {team_added_text}\n"
-            f":busts_in_silhouette: Team removed: {team_removed_text}"
+            f":busts_in_silhouette: Team removed: {team_removed_text}\n"
+            f":card_file_box: Response cache: {response_cache.hits} hits, "
+            f"{response_cache.misses} misses"
         )
 
     async def _get_debug_thread(self) -> discord.Thread | None:
@@ -224,7 +241,8 @@ class GitHubManagement(Cog):
             await report_thread.send(message)
 
     async def cog_load(self) -> None:
-        """Start the GitHub synchronisation task."""
+        """Load the login cache and start the GitHub synchronisation task."""
+        await self._login_cache.load()
         self.sync_github_org.start()
 
     async def cog_unload(self) -> None:
@@ -233,11 +251,15 @@ class GitHubManagement(Cog):
 
     async def _fetch_common_info(self) -> SyncCommonInfo:
         """Fetch common data needed for both GitHub org and team synchronisation."""
-        keycloak_identities = await all_github_identities()
-        github_org_members = await list_organisation_member_identities(self.bot.http_session)
+        keycloak_identities = await self._identity_cache.get()
+        snapshot = await self._fetch_membership_snapshot()
+        if snapshot is not None:
+            github_org_members = snapshot.org_members_by_id
+        else:
+            github_org_members = await list_organisation_member_identities(self.bot.http_session)
 
         # Update cache with current org members
-        self._resolved_logins_cache.update(github_org_members)
+        await self._login_cache.store(github_org_members)
 
         resolved_keycloak_logins_by_id = await self._resolve_logins_by_user_id(
             keycloak_identities,
@@ -252,8 +274,23 @@ class GitHubManagement(Cog):
             resolved_logins_by_user_id=resolved_keycloak_logins_by_id,
             pending_invitations=pending_invitations,
             failed_invitations=failed_invitations,
+            team_members_by_slug=snapshot.team_members if snapshot is not None else None,
         )
 
+    async def _fetch_membership_snapshot(self) -> MembershipSnapshot | None:
+        """Fetch org and team membership over GraphQL, if enabled and available."""
+        if not CONFIG.github_use_graphql:
+            return None
+
+        team_slugs = [mapping["github_team_slug"] for mapping in LDAP_ROLE_MAPPING.values()]
+        try:
+            return await fetch_membership_snapshot(team_slugs, self.bot.http_session)
+        except GitHubError as e:
+            logger.opt(exception=e).warning(
+                "GitHub: GraphQL membership snapshot failed, falling back to REST."
+            )
+            return None
+
     async def _resolve_logins_by_user_id(
         self,
         keycloak_identities: dict[str, dict[str, str]],
@@ -267,21 +304,56 @@ class GitHubManagement(Cog):
             if identity.get("user_id") and identity["user_id"].strip() not in github_org_members
         }
 
-        for user_id in sorted(unresolved_user_ids):
-            if user_id in self._resolved_logins_cache:
-                resolved_keycloak_logins_by_id[user_id] = self._resolved_logins_cache[user_id]
-                continue
+        missing_user_ids = self._login_cache.misses(unresolved_user_ids)
+        if missing_user_ids and CONFIG.github_use_graphql:
+            await self._resolve_logins_over_graphql(missing_user_ids)
+            missing_user_ids = self._login_cache.misses(missing_user_ids)
+        if missing_user_ids:
+            await self._resolve_logins_over_rest(missing_user_ids)
 
-            resolved_login = await get_username_for_user_id(user_id, self.bot.http_session)
-            if resolved_login:
+        for user_id in sorted(unresolved_user_ids):
+            if resolved_login := self._login_cache.get(user_id):
                 resolved_keycloak_logins_by_id[user_id] = resolved_login
-                self._resolved_logins_cache[user_id] = resolved_login
                 continue
 
             logger.warning(f"GitHub: Could not resolve login for GitHub user ID {user_id}.")
 
         return resolved_keycloak_logins_by_id
 
+    async def _resolve_logins_over_graphql(self, user_ids: set[str]) -> None:
+        """Resolve user IDs in bulk, leaving any failures to the REST lookups."""
+        try:
+            resolved = await resolve_logins_by_user_id(user_ids, self.bot.http_session)
+        except GitHubError as e:
+            logger.opt(exception=e).warning(
+                "GitHub: GraphQL login resolution failed, falling back to REST."
+            )
+            return
+
+        # Unresolved IDs aren't cached as missing here, as GraphQL can't see every legacy account.
+        await self._login_cache.store(resolved)
+
+    async def _resolve_login_over_rest(
+        self,
+        user_id: str,
+        semaphore: asyncio.Semaphore,
+    ) -> tuple[str, str | None] | None:
+        """Resolve a single user ID, returning None if the lookup itself failed."""
+        async with semaphore:
+            try:
+                return user_id, await get_username_for_user_id(user_id, self.bot.http_session)
+            except GitHubError as e:
+                logger.opt(exception=e).warning(f"GitHub: Failed to resolve user ID {user_id}.")
+                return None
+
+    async def _resolve_logins_over_rest(self, user_ids: set[str]) -> None:
+        """Resolve user IDs one request each, caching accounts that no longer exist as missing."""
+        semaphore = asyncio.Semaphore(self.MAX_LOGIN_RESOLUTION_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._resolve_login_over_rest(user_id, semaphore) for user_id in sorted(user_ids))
+        )
+        await self._login_cache.store(dict(result for result in results if result is not None))
+
     def _build_org_identity_maps(
         self,
         common_info: SyncCommonInfo,
@@ -452,6 +524,7 @@ class GitHubManagement(Cog):
                     "GitHub: Failed to remove Keycloak GitHub link for "
                     f"{keycloak_username} (GitHub: {username})."
                 )
+            self._identity_cache.invalidate(keycloak_user_id)
 
             await self._try_dm_user_failed_invite(username, keycloak_username)
 
@@ -738,56 +811,112 @@ class GitHubManagement(Cog):
 
         return added, removed
 
+    async def _plan_team_sync(
+        self,
+        ldap_members: list[ldap.LDAPUser],
+        github_team_slug: str,
+        common_info: SyncCommonInfo,
+        keycloak_to_github: dict[str, str],
+        org_users_to_remove_normalised: set[str],
+    ) -> TeamSyncPlan:
+        """Fetch the current members of one team and plan its changes."""
+        desired_team_members = [
+            keycloak_to_github[member.uid]
+            for member in ldap_members
+            if member.uid in keycloak_to_github
+        ]
+
+        if common_info.team_members_by_slug is not None:
+            current_team_members = common_info.team_members_by_slug[github_team_slug]
+        else:
+            current_team_members = await list_team_members(github_team_slug, self.bot.http_session)
+
+        return self._build_team_sync_plan(
+            team_slug=github_team_slug,
+            desired_team_members=desired_team_members,
+            current_team_members=current_team_members,
+            org_users_to_remove_normalised=org_users_to_remove_normalised,
+        )
+
+    async def _add_team_member(
+        self, username: str, github_team_slug: str, semaphore: asyncio.Semaphore
+    ) -> str | None:
+        """Add a user to a team, returning the applied change or None if it failed."""
+        async with semaphore:
+            try:
+                await add_member_to_team(username, github_team_slug, self.bot.http_session)
+            except GitHubError as e:
+                logger.opt(exception=e).error(
+                    f"GitHub: Failed to add {username} to team {github_team_slug}"
+                )
+                return None
+
+        return f"{username} -> {github_team_slug}"
+
+    async def _remove_team_member(
+        self, username: str, github_team_slug: str, semaphore: asyncio.Semaphore
+    ) -> str | None:
+        """Remove a user from a team, returning the applied change or None if it failed."""
+        async with semaphore:
+            try:
+                await remove_member_from_team(username, github_team_slug, self.bot.http_session)
+            except GitHubError as e:
+                logger.opt(exception=e).error(
+                    f"GitHub: Failed to remove {username} from team {github_team_slug}"
+                )
+                return None
+
+        return f"{username} -> {github_team_slug}"
+
     async def _sync_github_teams(
         self,
         report_thread: discord.Thread,
         common_info: SyncCommonInfo,
     ) -> tuple[list[str], list[str]]:
-        """Synchronise GitHub team membership with Keycloak."""
+        """
+        Synchronise GitHub team membership with Keycloak.
+
+        All teams are planned concurrently, then every membership change is applied in parallel,
+        with at most `CONFIG.github_mutation_concurrency` requests in flight.
+        """
         keycloak_to_github = self._build_keycloak_to_github_map(common_info)
         org_users_to_remove_normalised = self._org_users_to_remove_normalised(common_info)
-
-        added: list[str] = []
-        removed: list[str] = []
-
-        for ldap_group, mapping in LDAP_ROLE_MAPPING.items():
-            github_team_slug = mapping["github_team_slug"]
-            ldap_members = await ldap.get_group_members(ldap_group)
-            desired_team_members = [
-                keycloak_to_github[member.uid]
-                for member in ldap_members
-                if member.uid in keycloak_to_github
-            ]
-
-            current_team_members = await list_team_members(github_team_slug, self.bot.http_session)
-
-            plan = self._build_team_sync_plan(
-                team_slug=github_team_slug,
-                desired_team_members=desired_team_members,
-                current_team_members=current_team_members,
-                org_users_to_remove_normalised=org_users_to_remove_normalised,
+        ldap_members_by_group = await ldap.get_groups_members(LDAP_ROLE_MAPPING)
+
+        plans = await asyncio.gather(
+            *(
+                self._plan_team_sync(
+                    ldap_members_by_group[ldap_group],
+                    mapping["github_team_slug"],
+                    common_info,
+                    keycloak_to_github,
+                    org_users_to_remove_normalised,
+                )
+                for ldap_group, mapping in LDAP_ROLE_MAPPING.items()
             )
+        )
+        for plan in plans:
             await self._report_team_sync_plan(report_thread, plan)
 
-            for username in plan.diff.to_add:
-                try:
-                    await add_member_to_team(username, github_team_slug, self.bot.http_session)
-                    added.append(f"{username} -> {github_team_slug}")
-                except GitHubError as e:
-                    logger.opt(exception=e).error(
-                        f"GitHub: Failed to add {username} to team {github_team_slug}"
-                    )
-
-            for username in plan.diff.to_remove:
-                try:
-                    await remove_member_from_team(username, github_team_slug, self.bot.http_session)
-                    removed.append(f"{username} -> {github_team_slug}")
-                except GitHubError as e:
-                    logger.opt(exception=e).error(
-                        f"GitHub: Failed to remove {username} from team {github_team_slug}"
-                    )
+        semaphore = asyncio.Semaphore(CONFIG.github_mutation_concurrency)
+        added, removed = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    self._add_team_member(username, plan.team_slug, semaphore)
+                    for plan in plans
+                    for username in plan.diff.to_add
+                )
+            ),
+            asyncio.gather(
+                *(
+                    self._remove_team_member(username, plan.team_slug, semaphore)
+                    for plan in plans
+                    for username in plan.diff.to_remove
+                )
+            ),
+        )
 
-        return added, removed
+        return [change for change in added if change], [change for change in removed if change]
 
 
 async def setup(bot: KingArthurTheTerrible) -> None:
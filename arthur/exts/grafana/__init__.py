@@ -7,6 +7,16 @@ class MissingMembers:
 
     count: int
     successfully_added: int
+    failed: int = 0
+
+
+@dataclass(frozen=True)
+class ExtraMembers:
+    """Number of members that were in the Grafana team but not LDAP, and how many were removed."""
+
+    count: int
+    successfully_removed: int
+    failed: int = 0
 
 
 @dataclass(frozen=True)
@@ -14,4 +24,14 @@ class SyncFigures:
     """Figures related to a single sync members task run."""
 
     added: MissingMembers
-    removed: int
+    removed: ExtraMembers
+    duration: float = 0.0
+
+
+@dataclass(frozen=True)
+class GrafanaUser:
+    """The fields of a Grafana org user needed for team sync."""
+
+    user_id: int
+    login: str
+    is_ldap: bool
@@ -1,3 +1,5 @@
+import asyncio
+import time
 from typing import TYPE_CHECKING
 
 import aiohttp
@@ -9,9 +11,11 @@ from arthur.apis.directory import ldap
 from arthur.config import CONFIG
 from arthur.log import logger
 
-from . import MissingMembers, SyncFigures
+from . import ExtraMembers, GrafanaUser, MissingMembers, SyncFigures
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable
+
     from arthur.bot import KingArthurTheTerrible
 
 GRAFANA_TO_LDAP_NAME_MAPPING = {
@@ -38,12 +42,41 @@ class GrafanaLDAPTeamSync(commands.Cog):
         """Cancel background tasks on unload."""
         self.sync_ldap_grafana_teams.cancel()
 
+    @staticmethod
+    async def _index_users(grafana_users: AsyncIterator[dict]) -> dict[str, GrafanaUser]:
+        """Index a snapshot of Grafana org users by login, keeping only the fields sync needs."""
+        return {
+            user["login"]: GrafanaUser(
+                user_id=user["userId"],
+                login=user["login"],
+                is_ldap="LDAP" in (user.get("authLabels") or []),
+            )
+            async for user in grafana_users
+        }
+
+    async def _apply_mutation(
+        self,
+        mutation: Callable[[int, int, aiohttp.ClientSession], Awaitable[dict]],
+        grafana_user: GrafanaUser,
+        grafana_team_id: int,
+    ) -> bool:
+        """Apply a team membership change, returning whether it succeeded."""
+        try:
+            await mutation(grafana_user.user_id, grafana_team_id, self.bot.http_session)
+        except aiohttp.ClientResponseError as e:
+            logger.opt(exception=e).warning(
+                f"Grafana: {mutation.__name__} failed for {grafana_user.login} "
+                f"in team {grafana_team_id}"
+            )
+            return False
+        return True
+
     async def _add_missing_members(
         self,
         grafana_team_id: int,
         ldap_team_members: set[str],
         grafana_team_members: set[str],
-        all_grafana_users: list[dict],
+        grafana_users_by_login: dict[str, GrafanaUser],
     ) -> MissingMembers:
         """
         Adds members to the Grafana team if they're in the LDAP team and not already present.
@@ -51,58 +84,71 @@ class GrafanaLDAPTeamSync(commands.Cog):
         Returns the number of missing members, and the number of members it could actually add.
         """
         missing_members = ldap_team_members - grafana_team_members
-        added_members = 0
-        for grafana_user in all_grafana_users:
-            if grafana_user["login"] not in missing_members:
-                continue
-            if "LDAP" not in grafana_user.get("authLabels", []):
-                continue
-
-            await grafana.add_user_to_team(
-                grafana_user["userId"],
-                grafana_team_id,
-                self.bot.http_session,
+        to_add = [
+            grafana_users_by_login[login]
+            for login in sorted(missing_members)
+            if login in grafana_users_by_login and grafana_users_by_login[login].is_ldap
+        ]
+        results = await asyncio.gather(
+            *(
+                self._apply_mutation(grafana.add_user_to_team, grafana_user, grafana_team_id)
+                for grafana_user in to_add
             )
-            added_members += 1
-        return MissingMembers(count=len(missing_members), successfully_added=added_members)
+        )
+        return MissingMembers(
+            count=len(missing_members),
+            successfully_added=sum(results),
+            failed=len(results) - sum(results),
+        )
 
     async def _remove_extra_members(
         self,
         grafana_team_id: int,
         ldap_team_members: set[str],
         grafana_team_members: set[str],
-        all_grafana_users: list[dict],
-    ) -> int:
+        grafana_users_by_login: dict[str, GrafanaUser],
+    ) -> ExtraMembers:
         """
         Removes Grafana users from a team if they are not present in the LDAP team.
 
-        Return how many were removed.
+        Return how many there were, and how many were removed.
         """
         extra_members = grafana_team_members - ldap_team_members
-        removed_members = 0
-        for grafana_user in all_grafana_users:
-            if grafana_user["login"] not in extra_members:
-                continue
-            await grafana.remove_user_from_team(
-                grafana_user["userId"],
-                grafana_team_id,
-                self.bot.http_session,
+        to_remove = [
+            grafana_users_by_login[login]
+            for login in sorted(extra_members)
+            if login in grafana_users_by_login
+        ]
+        results = await asyncio.gather(
+            *(
+                self._apply_mutation(grafana.remove_user_from_team, grafana_user, grafana_team_id)
+                for grafana_user in to_remove
             )
-            removed_members += 1
-        return removed_members
+        )
+        return ExtraMembers(
+            count=len(extra_members),
+            successfully_removed=sum(results),
+            failed=len(results) - sum(results),
+        )
 
-    async def _sync_teams(self, team: dict[str, str]) -> SyncFigures:
+    async def _sync_teams(
+        self,
+        team: dict[str, str],
+        ldap_members_by_group: dict[str, list[ldap.LDAPUser]],
+        grafana_users_by_login: dict[str, GrafanaUser],
+    ) -> SyncFigures:
         """
         Ensure members in LDAP are present in Grafana teams.
 
         Return the number of members missing from the Grafana team, and the number of members added.
         """
         if team["name"] not in GRAFANA_TO_LDAP_NAME_MAPPING:
-            return SyncFigures(added=MissingMembers(0, 0), removed=0)
+            return SyncFigures(added=MissingMembers(0, 0), removed=ExtraMembers(0, 0))
 
+        start = time.perf_counter()
         ldap_team_members = {
             member.uid
-            for member in await ldap.get_group_members(GRAFANA_TO_LDAP_NAME_MAPPING[team["name"]])
+            for member in ldap_members_by_group[GRAFANA_TO_LDAP_NAME_MAPPING[team["name"]]]
         }
         grafana_team_members = {
             member["login"]
@@ -110,44 +156,86 @@ class GrafanaLDAPTeamSync(commands.Cog):
             if member.get("auth_module") == "ldap"
         }
 
-        all_grafana_users = await grafana.get_all_users(self.bot.http_session)
-        added_members = await self._add_missing_members(
-            team["id"],
-            ldap_team_members,
-            grafana_team_members,
-            all_grafana_users,
+        added_members, removed_members = await asyncio.gather(
+            self._add_missing_members(
+                team["id"],
+                ldap_team_members,
+                grafana_team_members,
+                grafana_users_by_login,
+            ),
+            self._remove_extra_members(
+                team["id"],
+                ldap_team_members,
+                grafana_team_members,
+                grafana_users_by_login,
+            ),
         )
-        removed_members = await self._remove_extra_members(
-            team["id"],
-            ldap_team_members,
-            grafana_team_members,
-            all_grafana_users,
+
+        return SyncFigures(
+            added=added_members,
+            removed=removed_members,
+            duration=time.perf_counter() - start,
         )
 
-        return SyncFigures(added=added_members, removed=removed_members)
+    async def _try_sync_team(
+        self,
+        team: dict[str, str],
+        ldap_members_by_group: dict[str, list[ldap.LDAPUser]],
+        grafana_users_by_login: dict[str, GrafanaUser],
+    ) -> SyncFigures | aiohttp.ClientResponseError:
+        """Sync a team, returning the error instead of raising if a Grafana request failed."""
+        logger.debug(f"Processing {team['name']}")
+        try:
+            return await self._sync_teams(team, ldap_members_by_group, grafana_users_by_login)
+        except aiohttp.ClientResponseError as e:
+            logger.opt(exception=e).error(f"Error whilst procesing Grafana team {team['name']}")
+            return e
 
     @tasks.loop(hours=12)
     async def sync_ldap_grafana_teams(self, channel: discord.TextChannel | None = None) -> None:
-        """Update Grafana team membership to match LDAP team membership."""
-        grafana_teams = await grafana.list_teams(self.bot.http_session)
+        """
+        Update Grafana team membership to match LDAP team membership.
+
+        Teams are reconciled concurrently, with the number of membership changes in flight limited
+        by `KING_ARTHUR_GRAFANA_MUTATION_CONCURRENCY`.
+        """
+        ldap_members_by_group = await ldap.get_groups_members(GRAFANA_TO_LDAP_NAME_MAPPING.values())
+        # One snapshot of the org's users is shared by every team in this run.
+        grafana_users_by_login = await self._index_users(
+            grafana.iter_org_users(self.bot.http_session)
+        )
         embed = discord.Embed(
             title="Sync Stats",
             colour=discord.Colour.blue(),
         )
-        for team in grafana_teams:
-            logger.debug(f"Processing {team['name']}")
-            try:
-                figures = await self._sync_teams(team)
-            except aiohttp.ClientResponseError as e:
-                logger.opt(exception=e).error(f"Error whilst procesing Grafana team {team['name']}")
+        # Each team starts reconciling as soon as its page of results arrives.
+        team_syncs = []
+        try:
+            async for team in grafana.iter_teams(self.bot.http_session):
+                task = asyncio.create_task(
+                    self._try_sync_team(team, ldap_members_by_group, grafana_users_by_login)
+                )
+                team_syncs.append((team, task))
+        except BaseException:
+            # Don't leave teams being reconciled in the background if a later page failed.
+            for _, task in team_syncs:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in team_syncs), return_exceptions=True)
+            raise
+        results = await asyncio.gather(*(task for _, task in team_syncs))
+        for (team, _), figures in zip(team_syncs, results, strict=True):
+            if isinstance(figures, aiohttp.ClientResponseError):
                 if channel:
-                    await channel.send(e)
+                    await channel.send(figures)
                 continue
 
             lines = [
                 f"Missing: {figures.added.count}",
                 f"Added: {figures.added.successfully_added}",
-                f"Removed: {figures.removed}",
+                f"Extra: {figures.removed.count}",
+                f"Removed: {figures.removed.successfully_removed}",
+                f"Failed: {figures.added.failed + figures.removed.failed}",
+                f"Took: {figures.duration:.2f}s",
             ]
             embed.add_field(
                 name=team["name"],
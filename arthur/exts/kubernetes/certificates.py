@@ -1,12 +1,11 @@
 """The Certificates cog helps with managing TLS certificates."""
 
-from textwrap import dedent
 from typing import TYPE_CHECKING
 
 from discord.ext import commands
-from tabulate import tabulate
 
 from arthur.apis.kubernetes import certificates
+from arthur.utils import tabulate_chunks
 
 if TYPE_CHECKING:
     from arthur.bot import KingArthurTheTerrible
@@ -38,18 +37,12 @@ class Certificates(commands.Cog):
             for certificate in certs["items"]
         ]
 
-        table = tabulate(
-            table_data, headers=["Name", "DNS Names", "Issuer", "Status"], tablefmt="psql"
-        )
-
-        return_message = dedent("""
-            **Certificates in namespace `{0}`**
-            ```
-            {1}
-            ```
-            """)
-
-        await ctx.send(return_message.format(namespace, table))
+        for message in tabulate_chunks(
+            table_data,
+            headers=["Name", "DNS Names", "Issuer", "Status"],
+            title=f"**Certificates in namespace `{namespace}`**",
+        ):
+            await ctx.send(message)
 
 
 async def setup(bot: KingArthurTheTerrible) -> None:
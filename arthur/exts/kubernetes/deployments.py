@@ -1,16 +1,14 @@
 """The Deployments cog helps with managing Kubernetes deployments."""
 
 from http import HTTPStatus
-from textwrap import dedent
 from typing import TYPE_CHECKING
 
 from discord import ButtonStyle, Interaction, ui
 from discord.ext import commands
 from kubernetes_asyncio.client.rest import ApiException
-from tabulate import tabulate
 
 from arthur.apis.kubernetes import deployments
-from arthur.utils import generate_error_message
+from arthur.utils import datetime_to_discord, generate_error_message, tabulate_chunks
 
 if TYPE_CHECKING:
     from kubernetes_asyncio.client.models import V1Deployment
@@ -135,21 +133,14 @@ class Deployments(commands.Cog):
                 ]
             )
 
-        table = tabulate(
+        synced_at = datetime_to_discord(deployments.get_deployment_informer().synced_at, "R")
+        for message in tabulate_chunks(
             table_data,
             headers=["Status", "Deployment", "Replicas"],
-            tablefmt="psql",
+            title=f"**Deployments in namespace `{namespace}`** (as of {synced_at})",
             colalign=("center", "left", "center"),
-        )
-
-        return_message = dedent("""
-            **Deployments in namespace `{0}`**
-            ```
-            {1}
-            ```
-            """)
-
-        await ctx.send(return_message.format(namespace, table))
+        ):
+            await ctx.send(message)
         return None
 
     @deployments.command(name="restart", aliases=["redeploy"])
@@ -7,6 +7,7 @@ from discord.ext import commands
 
 from arthur.apis.kubernetes import jobs
 from arthur.config import CONFIG
+from arthur.utils import datetime_to_discord
 
 if TYPE_CHECKING:
     from kubernetes_asyncio.client.models import V1CronJobList
@@ -77,7 +78,8 @@ class Jobs(commands.Cog):
         cronjobs = await jobs.list_cronjobs()
 
         view = CronJobView(cronjobs)
-        await ctx.send(":tools: Pick a CronJob to trigger", view=view)
+        synced_at = datetime_to_discord(jobs.get_cronjob_informer().synced_at, "R")
+        await ctx.send(f":tools: Pick a CronJob to trigger (as of {synced_at})", view=view)
 
 
 async def setup(bot: KingArthurTheTerrible) -> None:
@@ -1,12 +1,11 @@
 """The Nodes cog helps with managing Kubernetes nodes."""
 
-from textwrap import dedent
 from typing import TYPE_CHECKING
 
 from discord.ext import commands
-from tabulate import tabulate
 
 from arthur.apis.kubernetes import nodes
+from arthur.utils import datetime_to_discord, tabulate_chunks
 
 if TYPE_CHECKING:
     from arthur.bot import KingArthurTheTerrible
@@ -62,18 +61,13 @@ class Nodes(commands.Cog):
                 ]
             )
 
-        table = tabulate(
-            table_data, headers=["Name", "Status", "Kubernetes Version", "Created"], tablefmt="psql"
-        )
-
-        return_message = dedent("""
-            **Cluster nodes**
-            ```
-            {0}
-            ```
-            """)
-
-        await ctx.send(return_message.format(table))
+        synced_at = datetime_to_discord(nodes.get_node_informer().synced_at, "R")
+        for message in tabulate_chunks(
+            table_data,
+            headers=["Name", "Status", "Kubernetes Version", "Created"],
+            title=f"**Cluster nodes** (as of {synced_at})",
+        ):
+            await ctx.send(message)
 
     @nodes.command(name="cordon")
     async def nodes_cordon(self, ctx: commands.Context, *, node: str) -> None:
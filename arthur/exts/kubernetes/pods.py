@@ -1,37 +1,304 @@
 """The Pods cog helps with managing Kubernetes pods."""
 
+import argparse
+import asyncio
+import contextlib
+import gzip
+import io
+import re
+import shlex
 import zoneinfo
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
-from typing import TYPE_CHECKING
+from http import HTTPStatus
+from typing import Annotated, NoReturn, TYPE_CHECKING
 
 import discord
 import humanize
 from discord.ext import commands
 from kubernetes_asyncio.client.rest import ApiException
 from loguru import logger
-from tabulate import tabulate
 
 from arthur.apis.kubernetes import pods
 from arthur.config import CONFIG
 from arthur.pagination import LinePaginator
-from arthur.utils import generate_error_message
+from arthur.utils import datetime_to_discord, generate_error_message, tabulate_chunks
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from arthur.bot import KingArthurTheTerrible
 
 MAX_MESSAGE_LENGTH = 2000
+MAX_CONCURRENT_LOG_FETCHES = 5
+
+DEFAULT_TAIL_LINES = 15
+# With --grep only the matching lines are shown, so a wider window is searched by default.
+DEFAULT_GREP_TAIL_LINES = 1000
+# Log bodies are capped so that a chatty pod can't balloon the bot's memory.
+DEFAULT_LIMIT_BYTES = 512 * 1024
+MAX_LIMIT_BYTES = 8 * 1024 * 1024
+# Logs longer than this are uploaded as a compressed file rather than paginated.
+MAX_PAGINATED_LENGTH = 10 * MAX_MESSAGE_LENGTH
+# Stays within Discord's smallest upload limit.
+MAX_ATTACHMENT_BYTES = 8 * 1024 * 1024
+DURATION_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 * 1024}
+
+FOLLOW_TIMEOUT_SECONDS = 10 * 60
+# Message edits are rate limited, so new lines are buffered and flushed at most this often.
+FOLLOW_EDIT_INTERVAL_SECONDS = 2
+# Longer lines are cut short so that a single line can't push everything else out of view.
+FOLLOW_MAX_LINE_LENGTH = 300
+STOP_EMOJI = "\N{BLACK SQUARE FOR STOP}"
+
+
+class _OptionParser(argparse.ArgumentParser):
+    """An argument parser that reports errors as a bad command argument instead of exiting."""
+
+    def error(self, message: str) -> NoReturn:
+        raise commands.BadArgument(message)
+
+
+def parse_duration(value: str) -> int:
+    """Parse a duration such as `30s`, `15m` or `1h30m` into seconds."""
+    if not re.fullmatch(r"(\d+[smhd])+", value):
+        msg = f"invalid duration {value!r}, try e.g. 30s, 15m or 1h30m"
+        raise argparse.ArgumentTypeError(msg)
+    return sum(
+        int(amount) * DURATION_UNITS[unit] for amount, unit in re.findall(r"(\d+)(\w)", value)
+    )
 
 
-def tabulate_pod_data(data: list[list[str]]) -> str:
-    """Tabulate the pod data to be sent to Discord."""
-    table = tabulate(
-        data,
-        headers=["Status", "Pod", "Phase", "IP", "Node", "Age", "Restarts"],
-        tablefmt="psql",
-        colalign=("center", "left", "left", "center", "center", "left", "center"),
+def parse_size(value: str) -> int:
+    """Parse a byte count such as `4096`, `64k` or `2m`, up to `MAX_LIMIT_BYTES`."""
+    match = re.fullmatch(r"(\d+)([km]?)", value.lower())
+    if match is None:
+        msg = f"invalid size {value!r}, try e.g. 4096, 64k or 2m"
+        raise argparse.ArgumentTypeError(msg)
+
+    size = int(match[1]) * SIZE_UNITS[match[2]]
+    if not 0 < size <= MAX_LIMIT_BYTES:
+        msg = (
+            f"size must be between 1 byte and {humanize.naturalsize(MAX_LIMIT_BYTES, binary=True)}"
+        )
+        raise argparse.ArgumentTypeError(msg)
+    return size
+
+
+def parse_pattern(value: str) -> re.Pattern:
+    """Compile a `--grep` pattern."""
+    try:
+        return re.compile(value)
+    except re.error as e:
+        msg = f"invalid pattern {value!r}: {e}"
+        raise argparse.ArgumentTypeError(msg) from e
+
+
+@dataclass(frozen=True)
+class LogOptions:
+    """Options for the `pods logs` command."""
+
+    namespace: str = "default"
+    lines: int | None = None
+    follow: bool = False
+    merge: bool = False
+    since: int | None = None
+    grep: re.Pattern | None = None
+    previous: bool = False
+    container: str | None = None
+    limit_bytes: int = DEFAULT_LIMIT_BYTES
+    attach: bool = False
+
+    @property
+    def tail_lines(self) -> int | None:
+        """The number of lines to request, defaulting to everything in the `--since` window."""
+        if self.lines is not None:
+            return self.lines
+        if self.since is not None:
+            return None
+        return DEFAULT_GREP_TAIL_LINES if self.grep is not None else DEFAULT_TAIL_LINES
+
+    def matches(self, line: str) -> bool:
+        """Whether a log line passes the `--grep` filter, if one was given."""
+        return self.grep is None or self.grep.search(line) is not None
+
+    @property
+    def paginated_length(self) -> int:
+        """The longest log that is paginated rather than attached."""
+        return 0 if self.attach else MAX_PAGINATED_LENGTH
+
+
+DEFAULT_LOG_OPTIONS = LogOptions()
+
+
+class LogOptionsConverter(commands.Converter):
+    """Parse the arguments following the pod name in `pods logs`, e.g. `kube-system 50 --follow`."""
+
+    parser = _OptionParser(prog="pods logs", add_help=False)
+    parser.add_argument("namespace", nargs="?", default=DEFAULT_LOG_OPTIONS.namespace)
+    parser.add_argument("lines", nargs="?", type=int)
+    parser.add_argument("-f", "--follow", action="store_true")
+    parser.add_argument("-m", "--merge", action="store_true")
+    parser.add_argument("-s", "--since", type=parse_duration)
+    parser.add_argument("-g", "--grep", type=parse_pattern)
+    parser.add_argument("-p", "--previous", action="store_true")
+    parser.add_argument("-c", "--container")
+    parser.add_argument(
+        "-b", "--bytes", dest="limit_bytes", type=parse_size, default=DEFAULT_LIMIT_BYTES
     )
-
-    return f"```\n{table}```"
+    parser.add_argument("-a", "--attach", action="store_true")
+
+    async def convert(self, _ctx: commands.Context, argument: str) -> LogOptions:
+        """Parse the arguments into a `LogOptions`."""
+        try:
+            args = shlex.split(argument)
+        except ValueError as e:
+            raise commands.BadArgument(str(e)) from e
+
+        return LogOptions(**vars(self.parser.parse_args(args)))
+
+
+class LogCollector:
+    """
+    Log lines being gathered for display.
+
+    Lines are kept as a list for pagination until they add up to more than `paginated_length`
+    characters. From then on they are written to a gzip-compressed in-memory buffer instead, to
+    be uploaded as a file, and are no longer accepted once it reaches `MAX_ATTACHMENT_BYTES`. The
+    cap is checked against what zlib has flushed so far, so it can be overshot by a block. A
+    `paginated_length` of None never compresses.
+    """
+
+    def __init__(self, paginated_length: int | None) -> None:
+        self.lines: list[str] = []
+        self.line_count = 0
+        self.truncated = False
+
+        self._paginated_length = paginated_length
+        self._length = 0
+        self._buffer: io.BytesIO | None = None
+        self._gzip: gzip.GzipFile | None = None
+        if paginated_length == 0:
+            self._start_compressing()
+
+    @property
+    def is_compressed(self) -> bool:
+        """Whether the lines have been moved to the compressed buffer."""
+        return self._gzip is not None
+
+    def _start_compressing(self) -> None:
+        self._buffer = io.BytesIO()
+        self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb")
+        self._gzip.writelines(f"{line}\n".encode() for line in self.lines)
+        self.lines = []
+
+    def add(self, line: str) -> bool:
+        """Add a line, returning False if it was refused because the size cap has been reached."""
+        if self._gzip is None:
+            self.lines.append(line)
+            self._length += len(line) + 1
+            if self._paginated_length is not None and self._length > self._paginated_length:
+                self._start_compressing()
+        elif self._buffer.tell() >= MAX_ATTACHMENT_BYTES:
+            self.truncated = True
+            return False
+        else:
+            self._gzip.write(f"{line}\n".encode())
+
+        self.line_count += 1
+        return True
+
+    def to_file(self, filename: str) -> discord.File:
+        """Finish compressing and wrap the buffer as an upload named `filename.log.gz`."""
+        self._gzip.close()
+        self._buffer.seek(0)
+        return discord.File(self._buffer, filename=f"{filename}.log.gz")
+
+
+async def read_pod_logs(
+    pod: str, options: LogOptions, collector: LogCollector, *, timestamps: bool = False
+) -> LogCollector:
+    """
+    Read a pod's logs with the options applied into `collector`.
+
+    Lines are filtered as they arrive, so only the matching lines are ever held in memory, and
+    reading stops early if the collector fills up.
+    """
+    stream = pods.stream_pod_logs(
+        options.namespace,
+        pod,
+        options.tail_lines,
+        timestamps=timestamps,
+        since_seconds=options.since,
+        limit_bytes=options.limit_bytes,
+        previous=options.previous,
+        container=options.container,
+    )
+    async with contextlib.aclosing(stream):
+        async for line in stream:
+            if options.matches(line.partition(" ")[2] if timestamps else line) and not (
+                collector.add(line)
+            ):
+                break
+
+    return collector
+
+
+def merge_logs(logs: dict[str, LogCollector], options: LogOptions) -> LogCollector:
+    """Merge timestamped logs from several pods into one collector, labelling each line."""
+    merged = LogCollector(options.paginated_length)
+    for pod, line in pods.merge_timestamped_logs(
+        {pod: collector.lines for pod, collector in logs.items()}
+    ):
+        if not merged.add(f"[{pod_label(pod)}] {line}"):
+            break
+    return merged
+
+
+def format_log_tail(header: str, lines: Iterable[str]) -> str:
+    """Render `header` followed by as many of the most recent `lines` as fit in one message."""
+    budget = MAX_MESSAGE_LENGTH - len(header) - len("\n```\n```")
+    tail = []
+    for line in reversed(lines):
+        budget -= len(line) + 1
+        if budget < 0:
+            break
+        tail.append(line)
+
+    return f"{header}\n```\n" + "\n".join(reversed(tail)) + "```"
+
+
+def log_error_message(error: ApiException, pod: str | None = None) -> str:
+    """Describe an error from the pod log API to the user, optionally naming the pod."""
+    if error.status == HTTPStatus.NOT_FOUND:
+        description = "Pod or namespace not found, check the name."
+    else:
+        description = str(error)
+
+    if pod is not None:
+        description = f"`{pod}`: {description}"
+    return generate_error_message(description=description)
+
+
+def pod_label(pod_name: str) -> str:
+    """Shorten a pod name to the random suffix that tells it apart from its replicas."""
+    return pod_name.rsplit("-", 1)[-1]
+
+
+def follow_status(
+    pod: str, done: set[asyncio.Task], stream_task: asyncio.Task, stop_task: asyncio.Task
+) -> str:
+    """Describe why following a pod's logs came to an end."""
+    if stop_task in done:
+        return "stopped"
+    if stream_task not in done:
+        return f"timed out after {humanize.naturaldelta(FOLLOW_TIMEOUT_SECONDS)}"
+    if (error := stream_task.exception()) is not None:
+        logger.opt(exception=error).warning(f"Kubernetes: Log stream for {pod} failed.")
+        return f"failed: `{error.__class__.__name__}`"
+    return "stream ended"
 
 
 class Pods(commands.Cog):
@@ -56,7 +323,7 @@ class Pods(commands.Cog):
             )
             return
 
-        tables = [[]]
+        table_data = []
 
         for pod in pod_list.items:
             match pod.status.phase:
@@ -80,39 +347,123 @@ class Pods(commands.Cog):
             # we know that Linode formats names like "lke<cluster>-<pool>-<node>"
             node_name = pod.spec.node_name.split("-")[2]
 
-            table_data = [
-                emote,
-                pod.metadata.name,
-                pod.status.phase,
-                pod.status.pod_ip,
-                node_name,
-                time_human,
-                pod.status.container_statuses[0].restart_count,
-            ]
-
-            if len(tabulate_pod_data(tables[-1] + [table_data])) > MAX_MESSAGE_LENGTH:
-                tables.append([])
-                tables[-1].append(table_data)
-            else:
-                tables[-1].append(table_data)
-
-        await ctx.send(f"**Pods in namespace `{namespace}`**")
+            table_data.append(
+                [
+                    emote,
+                    pod.metadata.name,
+                    pod.status.phase,
+                    pod.status.pod_ip,
+                    node_name,
+                    time_human,
+                    pod.status.container_statuses[0].restart_count,
+                ]
+            )
 
-        for table in tables:
-            await ctx.send(tabulate_pod_data(table))
+        synced_at = datetime_to_discord(pods.get_pod_informer().synced_at, "R")
+        for message in tabulate_chunks(
+            table_data,
+            headers=["Status", "Pod", "Phase", "IP", "Node", "Age", "Restarts"],
+            title=f"**Pods in namespace `{namespace}`** (as of {synced_at})",
+            colalign=("center", "left", "left", "center", "center", "left", "center"),
+        ):
+            await ctx.send(message)
 
         return
 
+    async def _follow_logs(self, ctx: commands.Context, pod: str, options: LogOptions) -> None:
+        """Stream a pod's logs into a single message until the stream ends, times out or is stopped."""
+        namespace = options.namespace
+        header = f"**Following logs for pod `{pod}` in namespace `{namespace}`**"
+        live_header = f"{header} (react with {STOP_EMOJI} to stop)"
+        # Each line takes at least two characters, so no more than this could ever be shown.
+        buffer = deque(maxlen=MAX_MESSAGE_LENGTH // 2)
+        received = asyncio.Event()
+
+        message = await ctx.send(format_log_tail(live_header, buffer))
+        await message.add_reaction(STOP_EMOJI)
+
+        async def read_stream() -> None:
+            # The byte limit is left off, as it would end the stream once reached.
+            stream = pods.stream_pod_logs(
+                namespace,
+                pod,
+                options.tail_lines,
+                follow=True,
+                since_seconds=options.since,
+                container=options.container,
+            )
+            async with contextlib.aclosing(stream):
+                async for line in stream:
+                    if options.matches(line):
+                        buffer.append(line[:FOLLOW_MAX_LINE_LENGTH])
+                        received.set()
+
+        async def flush_buffer() -> None:
+            while True:
+                await received.wait()
+                received.clear()
+                await message.edit(content=format_log_tail(live_header, buffer))
+                await asyncio.sleep(FOLLOW_EDIT_INTERVAL_SECONDS)
+
+        def is_stop_reaction(reaction: discord.Reaction, user: discord.abc.User) -> bool:
+            return (
+                reaction.message.id == message.id
+                and user.id == ctx.author.id
+                and str(reaction.emoji) == STOP_EMOJI
+            )
+
+        stream_task = asyncio.create_task(read_stream())
+        stop_task = asyncio.create_task(self.bot.wait_for("reaction_add", check=is_stop_reaction))
+        flush_task = asyncio.create_task(flush_buffer())
+
+        done, _ = await asyncio.wait(
+            {stream_task, stop_task},
+            timeout=FOLLOW_TIMEOUT_SECONDS,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in (stream_task, stop_task, flush_task):
+            task.cancel()
+        await asyncio.gather(stream_task, stop_task, flush_task, return_exceptions=True)
+
+        with contextlib.suppress(discord.HTTPException):
+            await message.clear_reaction(STOP_EMOJI)
+
+        if stream_task in done and isinstance(stream_task.exception(), ApiException):
+            await message.edit(content=log_error_message(stream_task.exception()))
+            return
+
+        status = follow_status(pod, done, stream_task, stop_task)
+        await message.edit(content=format_log_tail(f"{header} ({status})", buffer))
+
     @pods_cmd.command(name="logs", aliases=["log", "tail"])
     @commands.check(lambda ctx: ctx.channel.id == CONFIG.devops_channel_id)
     async def pods_logs(
-        self, ctx: commands.Context, pod_name: str, namespace: str = "default", lines: int = 15
+        self,
+        ctx: commands.Context,
+        pod_name: str,
+        *,
+        options: Annotated[LogOptions, LogOptionsConverter] = DEFAULT_LOG_OPTIONS,
     ) -> None:
         """
         Tail the logs of a pod in the selected namespace (defaults to default).
 
-        We also support the syntax of `deploy/<deployment-name>` to get the logs of the first pod associated with the deployment.
+        Usage: `pods logs <pod> [namespace] [lines] [options]`
+
+        We also support the syntax of `deploy/<deployment-name>` to get the logs of the pods associated with the deployment. Their logs are fetched concurrently and shown one pod after another, or with `--merge` (or `-m`) as a single time-ordered stream with each line labelled by its pod.
+
+        With `--follow` (or `-f`) new lines are streamed into a single message, which keeps updating until the pod's logs end (only the first pod of a deployment is followed), the invoker reacts with ⏹, or 10 minutes have passed.
+
+        Further options, all applied by the API server except `--grep`:
+        - `--since 1h30m` (`-s`): only logs from this long ago onwards, every line unless `lines` is also given.
+        - `--grep '<regex>'` (`-g`): only lines matching the pattern, searching the last 1000 lines by default.
+        - `--previous` (`-p`): logs of the previous container instance, e.g. after a crash.
+        - `--container <name>` (`-c`): the container to read in multi-container pods.
+        - `--bytes 2m` (`-b`): read at most this much log per pod (default 512k, at most 8m).
+
+        Logs too long to page through comfortably are uploaded as a gzip-compressed file instead, which `--attach` (`-a`) does regardless of length.
         """
+        namespace = options.namespace
+
         if pod_name.startswith("deploy/"):
             pod_names = await pods.get_pod_names_from_deployment(
                 namespace, pod_name.removeprefix("deploy/")
@@ -127,41 +478,82 @@ class Pods(commands.Cog):
             )
             return
 
-        for pod in pod_names:
-            try:
-                logs = await pods.tail_pod(namespace, pod, lines=lines)
-            except ApiException as e:
-                if e.status == 404:  # noqa: PLR2004, 404 is a known error
-                    await ctx.send(
-                        generate_error_message(
-                            description="Pod or namespace not found, check the name."
-                        )
-                    )
-                    return
-                await ctx.send(generate_error_message(description=str(e)))
-                return
-
-            if len(logs) == 0:
-                await ctx.send(generate_error_message(description="No logs found for the pod."))
-                return
-
-            logs = logs.splitlines()
-
-            logs_embed = discord.Embed(
-                title=f"**Logs for pod `{pod}` in namespace `{namespace}`**",
-                colour=discord.Colour.blue(),
+        if options.follow:
+            await self._follow_logs(ctx, pod_names[0], options)
+            return
+
+        merge = options.merge and len(pod_names) > 1
+        results = await self._fetch_logs(pod_names, options, merge=merge)
+
+        logs = {}
+        for pod, result in results.items():
+            if isinstance(result, ApiException):
+                await ctx.send(log_error_message(result, pod))
+            elif result.line_count == 0:
+                description = "No matching log lines" if options.grep else "No logs found"
+                await ctx.send(generate_error_message(description=f"{description} for `{pod}`."))
+            else:
+                logs[pod] = result
+
+        if merge and logs:
+            await self._send_logs(
+                ctx,
+                f"**Merged logs for `{pod_name}` in namespace `{namespace}`**",
+                merge_logs(logs, options),
+                pod_name.removeprefix("deploy/"),
             )
-            await LinePaginator.paginate(
-                lines=logs,
-                ctx=ctx,
-                max_size=MAX_MESSAGE_LENGTH,
-                empty=False,
-                embed=logs_embed,
-                prefix="```\n",
-                suffix="```",
+            return
+
+        for pod, collector in logs.items():
+            await self._send_logs(
+                ctx, f"**Logs for pod `{pod}` in namespace `{namespace}`**", collector, pod
             )
 
-        return
+    @staticmethod
+    async def _fetch_logs(
+        pod_names: list[str], options: LogOptions, *, merge: bool
+    ) -> dict[str, LogCollector | ApiException]:
+        """
+        Read several pods' logs concurrently, returning each one's lines or the error.
+
+        Logs read for merging are timestamped, and are never compressed as they still need to be
+        merged line by line.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOG_FETCHES)
+
+        async def fetch(pod: str) -> LogCollector | ApiException:
+            collector = LogCollector(None if merge else options.paginated_length)
+            async with semaphore:
+                try:
+                    return await read_pod_logs(pod, options, collector, timestamps=merge)
+                except ApiException as e:
+                    return e
+
+        results = await asyncio.gather(*(fetch(pod) for pod in pod_names))
+        return dict(zip(pod_names, results, strict=True))
+
+    @staticmethod
+    async def _send_logs(
+        ctx: commands.Context, title: str, collector: LogCollector, filename: str
+    ) -> None:
+        """Upload the logs as a compressed file if they were too long to paginate."""
+        if collector.is_compressed:
+            if collector.truncated:
+                size = humanize.naturalsize(MAX_ATTACHMENT_BYTES, binary=True)
+                title += f" (truncated at {size} compressed)"
+            await ctx.send(title, file=collector.to_file(filename))
+            return
+
+        logs_embed = discord.Embed(title=title, colour=discord.Colour.blue())
+        await LinePaginator.paginate(
+            lines=collector.lines,
+            ctx=ctx,
+            max_size=MAX_MESSAGE_LENGTH,
+            empty=False,
+            embed=logs_embed,
+            prefix="```\n",
+            suffix="```",
+        )
 
 
 async def setup(bot: KingArthurTheTerrible) -> None:
@@ -1,10 +1,15 @@
 """Utility functionality for King Arthur The Terrible."""
 
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
+
+from tabulate import tabulate
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
     from datetime import datetime
 
+MAX_MESSAGE_LENGTH = 2000
+
 
 def generate_error_message(
     *,
@@ -19,3 +24,43 @@ def generate_error_message(
 def datetime_to_discord(time: datetime, date_format: str = "f") -> str:
     """Convert a datetime object to a Discord timestamp."""
     return f"<t:{int(time.timestamp())}:{date_format}>"
+
+
+def tabulate_chunks(
+    rows: Sequence[Sequence[Any]],
+    headers: Sequence[str],
+    *,
+    title: str = "",
+    max_length: int = MAX_MESSAGE_LENGTH,
+    **tabulate_kwargs: Any,
+) -> list[str]:
+    """
+    Render a psql-style table as code blocks that each fit in a Discord message.
+
+    The table is rendered once, so every chunk shares the same column widths, and its rows are then
+    packed into chunks in a single pass with the header repeated at the top of each. `title` is
+    placed above the first chunk. Rows are expected to render on a single line.
+    """
+    lines = tabulate(rows, headers=headers, tablefmt="psql", **tabulate_kwargs).splitlines()
+    # The top border, header and separator, then one line per row, then the bottom border.
+    head, body, foot = lines[:3], lines[3:-1], lines[-1:]
+    if not body:
+        head, foot = lines, []
+
+    overhead = len("```\n```") + sum(len(line) + 1 for line in head + foot) - 1
+    chunks = []
+    current = []
+    length = overhead + (len(title) + 1 if title else 0)
+    for line in body:
+        if current and length + len(line) + 1 > max_length:
+            chunks.append(current)
+            current = []
+            length = overhead
+        current.append(line)
+        length += len(line) + 1
+    chunks.append(current)
+
+    messages = ["```\n" + "\n".join(head + chunk + foot) + "```" for chunk in chunks]
+    if title:
+        messages[0] = f"{title}\n{messages[0]}"
+    return messages